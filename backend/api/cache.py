@@ -0,0 +1,177 @@
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from redis.exceptions import RedisError
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+class Catalog:
+    """
+    Кэш справочника в памяти процесса.
+
+    Версия справочника хранится в Redis и меняется сигналами при
+    изменении данных, поэтому все воркеры сбрасывают свои копии
+    одновременно. Ответы отдаются со строгим ETag. Версии справочников
+    из dependencies тоже входят в проверку записей кэша ответов.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        dependencies: tuple['Catalog', ...] = (),
+    ) -> None:
+        self._version_key = f'catalog:{name}:version'
+        self._max_entries = max_entries
+        self._dependencies = dependencies
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self) -> str:
+        version = cache.get(self._version_key)
+        if version is None:
+            cache.add(self._version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(self._version_key)
+        return version
+
+    def bump(self) -> str:
+        version = uuid.uuid4().hex
+        cache.set(self._version_key, version, timeout=None)
+        return version
+
+    def respond(self, request: Request, handler: Callable) -> Response:
+        try:
+            version = ':'.join(
+                catalog.version() for catalog in (self, *self._dependencies)
+            )
+        except RedisError:
+            return handler()
+        key = request.get_full_path()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None or entry[0] != version:
+            response = handler()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = (version, self._get_etag(response.data), response.data)
+            self._store(key, entry)
+        _, etag, data = entry
+        headers = {'ETag': etag}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        return Response(data, headers=headers)
+
+    def _store(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _get_etag(data) -> str:
+        content = json.dumps(
+            data, sort_keys=True, ensure_ascii=False, default=str
+        )
+        return quote_etag(hashlib.sha1(content.encode()).hexdigest())
+
+
+class ResponseCache:
+    """
+    Кэш ответов для анонимных пользователей в Redis.
+
+    Ключ строится из адреса запроса и отсортированных параметров,
+    поэтому ?tags=a&tags=b&page=2 и ?page=2&tags=b&tags=a совпадают.
+    В ключ входит номер поколения: сигналы увеличивают его при любом
+    изменении данных, и старые записи истекают по таймауту.
+    """
+
+    def __init__(self, name: str, timeout: int) -> None:
+        self._name = name
+        self._generation_key = f'response:{name}:generation'
+        self._timeout = timeout
+
+    def generation(self) -> int:
+        cache.add(self._generation_key, 1, timeout=None)
+        return cache.get(self._generation_key)
+
+    def bump(self) -> None:
+        try:
+            cache.incr(self._generation_key)
+        except ValueError:
+            cache.add(self._generation_key, 1, timeout=None)
+
+    def respond(self, request: Request, handler: Callable) -> Response:
+        if not request.user.is_anonymous:
+            return handler()
+        try:
+            key = self._get_key(request, self.generation())
+            data = cache.get(key)
+        except RedisError:
+            return handler()
+        if data is None:
+            response = handler()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            try:
+                cache.set(key, data, timeout=self._timeout)
+            except RedisError:
+                pass
+        return Response(data)
+
+    def _get_key(self, request: Request, generation: int) -> str:
+        params = sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        )
+        content = json.dumps(
+            [request.build_absolute_uri(request.path), params]
+        )
+        digest = hashlib.sha1(content.encode()).hexdigest()
+        return f'response:{self._name}:{generation}:{digest}'
+
+
+def catalog_cached(catalog: Catalog | ResponseCache) -> Callable:
+    """
+    Отдаёт ответ метода вьюсета из кэша справочника или кэша ответов.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, request: Request, *args, **kwargs) -> Response:
+            return catalog.respond(
+                request=request,
+                handler=lambda: method(self, request, *args, **kwargs),
+            )
+
+        return wrapper
+
+    return decorator
+
+
+tags_catalog = Catalog(name='tags', max_entries=settings.CATALOG_CACHE_SIZE)
+# Только версия популярности ингредиентов: ответы под ней не хранятся.
+ingredients_usage = Catalog(name='ingredients_usage', max_entries=0)
+ingredients_catalog = Catalog(
+    name='ingredients',
+    max_entries=settings.CATALOG_CACHE_SIZE,
+    dependencies=(ingredients_usage,),
+)
+recipes_cache = ResponseCache(
+    name='recipes', timeout=settings.RESPONSE_CACHE_TIMEOUT
+)
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+
+def validate_image_size(size: int) -> None:
+    if size > settings.RECIPE_IMAGE_MAX_SIZE:
+        raise serializers.ValidationError(
+            'Размер изображения превышает '
+            f'{filesizeformat(settings.RECIPE_IMAGE_MAX_SIZE)}.'
+        )
+
+
+def validate_image_dimensions(width: int, height: int) -> None:
+    max_width, max_height = settings.RECIPE_IMAGE_MAX_DIMENSIONS
+    if width > max_width or height > max_height:
+        raise serializers.ValidationError(
+            f'Разрешение изображения превышает {max_width}x{max_height}.'
+        )
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Принимает изображение строкой base64 или файлом из multipart-запроса.
+    Размер base64 проверяется до декодирования, размер файла из
+    multipart уже ограничен при загрузке (см. parsers.ImageLimitHandler).
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            validate_image_size(data.size)
+            image = serializers.ImageField.to_internal_value(self, data)
+        else:
+            if isinstance(data, str):
+                validate_image_size(len(data) * 3 // 4)
+            image = super().to_internal_value(data)
+        if image is not None:
+            validate_image_dimensions(*image.image.size)
+        return image
@@ -1,15 +1,27 @@
-from django.db.models import QuerySet
+from django.db.models import Exists, OuterRef, QuerySet
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
 from recipes.models.basic import Recipe, Tag
 
 
+TAGS_MATCH_ANY = 'any'
+TAGS_MATCH_ALL = 'all'
+
+
 class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         queryset=Tag.objects.all(),
         to_field_name='slug',
+        method='filter_tags',
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=(
+            (TAGS_MATCH_ANY, 'Любой из тегов'),
+            (TAGS_MATCH_ALL, 'Все теги'),
+        ),
+        method='filter_tags_match',
     )
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
@@ -18,7 +30,32 @@ class RecipeFilter(FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags',
+            'tags_match',
+            'author',
+            'is_favorited',
+            'is_in_shopping_cart',
+        )
+
+    def filter_tags(self, queryset, name, value) -> QuerySet:
+        """
+        Полусоединение через EXISTS вместо JOIN по тегам: строки рецептов
+        не размножаются, и DISTINCT не нужен. По умолчанию рецепт
+        подходит, если у него есть любой из тегов, при tags_match=all —
+        все выбранные теги.
+        """
+        if not value:
+            return queryset
+        recipe_tags = Recipe.tags.through.objects.filter(recipe=OuterRef('pk'))
+        if self.form.cleaned_data.get('tags_match') == TAGS_MATCH_ALL:
+            for tag in value:
+                queryset = queryset.filter(Exists(recipe_tags.filter(tag=tag)))
+            return queryset
+        return queryset.filter(Exists(recipe_tags.filter(tag__in=value)))
+
+    def filter_tags_match(self, queryset, name, value) -> QuerySet:
+        return queryset
 
     def filter_is_favorited(self, queryset, name, value) -> QuerySet:
         if value:
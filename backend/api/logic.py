@@ -1,10 +1,176 @@
+import csv
+import hashlib
+import json
+import os
+import uuid
+from importlib import metadata
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.core.cache import cache
 from django.template.loader import render_to_string
-from weasyprint import HTML
+
+from .pdf_pool import pdf_renderer
+
+SHOPPING_LIST_CONTENT_TYPES = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+SHOPPING_LIST_FIELDS = ('name', 'amount', 'measurement_unit')
+# Входит в ключ кэша PDF: увеличивается при изменении pdf_template.html
+# или контекста шаблона, чтобы не отдавать файлы старой вёрстки.
+PDF_TEMPLATE_VERSION = 1
+try:
+    PDF_RENDERER_VERSION = metadata.version('weasyprint')
+except metadata.PackageNotFoundError:
+    PDF_RENDERER_VERSION = ''
+
+
+class Echo:
+    """
+    Буфер для csv.writer, возвращающий записанную строку.
+    """
+
+    def write(self, value: str) -> str:
+        return value
 
 
 def get_pdf(context: dict) -> bytes:
+    # WeasyPrint импортируется лениво: при включённом пуле рендера
+    # он загружается только в процессах пула.
+    from weasyprint import HTML
+
     template = render_to_string(
         template_name='pdf_template.html', context=context
     )
     html = HTML(string=template)
     return html.write_pdf()
+
+
+def remember_shopping_list_job(job_id: str, user_id: int) -> None:
+    cache.set(
+        f'shopping_list_job:{job_id}',
+        user_id,
+        timeout=settings.SHOPPING_LIST_JOB_TIMEOUT,
+    )
+
+
+def get_shopping_list_job_owner(job_id: str) -> int | None:
+    """
+    Id пользователя, поставившего задачу в очередь. None для
+    неизвестной или устаревшей задачи.
+    """
+    return cache.get(f'shopping_list_job:{job_id}')
+
+
+def get_cached_pdf(ingredients: list[tuple]) -> bytes:
+    """
+    PDF списка покупок из кэша на диске. Ключ — хэш строк списка,
+    поэтому повторная загрузка неизменной корзины не вызывает WeasyPrint.
+    """
+    path = get_pdf_cache_path(ingredients=ingredients)
+    try:
+        with open(path, 'rb') as file:
+            content = file.read()
+    except FileNotFoundError:
+        content = pdf_renderer.render(ingredients=ingredients)
+        save_to_pdf_cache(path=path, content=content)
+    else:
+        os.utime(path)
+    return content
+
+
+def render_to_pdf_cache(ingredients: list[tuple]) -> str:
+    """
+    Гарантирует наличие PDF в кэше и возвращает имя файла.
+    """
+    path = get_pdf_cache_path(ingredients=ingredients)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        content = pdf_renderer.render(ingredients=ingredients)
+        save_to_pdf_cache(path=path, content=content)
+    return os.path.basename(path)
+
+
+def get_pdf_cache_path(ingredients: list[tuple]) -> str:
+    """
+    Путь к PDF в кэше. Кроме строк списка ключ включает версии шаблона
+    и WeasyPrint: после их обновления файлы рендерятся заново.
+    """
+    key = json.dumps(
+        [PDF_TEMPLATE_VERSION, PDF_RENDERER_VERSION, ingredients],
+        ensure_ascii=False,
+        default=str,
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(settings.SHOPPING_LIST_CACHE_DIR, f'{digest}.pdf')
+
+
+def save_to_pdf_cache(path: str, content: bytes) -> None:
+    os.makedirs(settings.SHOPPING_LIST_CACHE_DIR, exist_ok=True)
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(content)
+    os.replace(temp_path, path)
+    evict_pdf_cache()
+
+
+def evict_pdf_cache() -> None:
+    """
+    Удаляет давно не запрашиваемые файлы, пока размер кэша
+    превышает SHOPPING_LIST_CACHE_MAX_SIZE.
+    """
+    files = []
+    with os.scandir(settings.SHOPPING_LIST_CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+    total_size = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total_size <= settings.SHOPPING_LIST_CACHE_MAX_SIZE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+def stream_shopping_list(
+    ingredients: Iterable[tuple], export_format: str
+) -> Iterator[str]:
+    """
+    Построчная выгрузка списка покупок без сборки документа в памяти.
+    """
+    streams = {
+        'txt': stream_txt,
+        'csv': stream_csv,
+        'json': stream_json,
+    }
+    return streams[export_format](ingredients)
+
+
+def stream_txt(ingredients: Iterable[tuple]) -> Iterator[str]:
+    yield 'Список покупок:\n'
+    for name, amount, measurement_unit in ingredients:
+        yield f'{name} - {amount} {measurement_unit}\n'
+
+
+def stream_csv(ingredients: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(SHOPPING_LIST_FIELDS)
+    for row in ingredients:
+        yield writer.writerow(row)
+
+
+def stream_json(ingredients: Iterable[tuple]) -> Iterator[str]:
+    separator = '['
+    for row in ingredients:
+        yield separator + json.dumps(
+            dict(zip(SHOPPING_LIST_FIELDS, row)), ensure_ascii=False
+        )
+        separator = ','
+    yield ']' if separator == ',' else '[]'
@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import Lower
+from django.test.utils import CaptureQueriesContext
+
+from api.search import ingredient_index
+from api.serializers.ingredients import IngredientSerializer
+from recipes.models.basic import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск ингредиентов по префиксу через индекс в памяти '
+        'с ORM-запросом name__istartswith: время, число запросов и '
+        'совпадение найденных ингредиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'prefixes', nargs='*', default=['а', 'ка', 'мол', 'сыр']
+        )
+        parser.add_argument(
+            '--limit', type=int, default=settings.INGREDIENT_SEARCH_LIMIT
+        )
+        parser.add_argument('--repeat', type=int, default=100)
+
+    def handle(self, *args, **options):
+        ingredient_index.rebuild()
+        self.stdout.write(f'Ингредиентов: {Ingredient.objects.count()}')
+        errors = []
+        for prefix in options['prefixes']:
+            variants = {
+                'index': lambda: ingredient_index.search(
+                    prefix=prefix, limit=options['limit']
+                ),
+                'orm top-k': lambda: self._orm_top(prefix, options['limit']),
+                'orm all': lambda: IngredientSerializer(
+                    Ingredient.objects.filter(name__istartswith=prefix),
+                    many=True,
+                ).data,
+            }
+            results = {
+                name: self._report(prefix, name, run, options['repeat'])
+                for name, run in variants.items()
+            }
+            if self._usage(results['index']) != self._usage(
+                results['orm top-k']
+            ):
+                errors.append(f'{prefix}: индекс расходится с ORM')
+        if errors:
+            raise CommandError('\n'.join(errors))
+
+    def _report(self, prefix: str, name: str, run, repeat: int) -> set[int]:
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                result = run()
+                timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f'{prefix:<8}{name:<12}'
+            f'{statistics.median(timings) * 1_000_000:>10.0f} us'
+            f'{len(context.captured_queries):>4} queries'
+            f'{len(result):>6} rows'
+        )
+        return {ingredient['id'] for ingredient in result}
+
+    @staticmethod
+    def _usage(ids: set[int]) -> list[int]:
+        """
+        Популярность найденных ингредиентов. Сравнивается она, а не id:
+        при равной популярности порядок названий зависит от сортировки
+        в БД (в SQLite LOWER() не меняет регистр кириллицы).
+        """
+        return sorted(
+            Ingredient.objects.filter(id__in=ids)
+            .annotate(usage=Count('amounts'))
+            .values_list('usage', flat=True)
+        )
+
+    @staticmethod
+    def _orm_top(prefix: str, limit: int) -> list[dict]:
+        """
+        То же ранжирование, что и в IngredientIndex: по числу рецептов,
+        затем по названию без учёта регистра и id.
+        """
+        return list(
+            Ingredient.objects.filter(name__istartswith=prefix.lower())
+            .annotate(usage=Count('amounts'))
+            .order_by('-usage', Lower('name'), 'id')
+            .values('id', 'name', 'measurement_unit')[:limit]
+        )
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.pdf_pool import LatencyStats, PdfRendererPool, _render
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает рендер PDF списка покупок в прогретом пуле процессов '
+        'и в текущем процессе на одном и том же списке: время первого '
+        'рендера и p50/p99 остальных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ingredients', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=max(settings.PDF_RENDER_POOL_SIZE, 1),
+        )
+
+    def handle(self, *args, **options):
+        ingredients = [
+            (f'ингредиент {number}', number + 1, 'г')
+            for number in range(options['ingredients'])
+        ]
+        pool = PdfRendererPool(
+            size=options['pool_size'],
+            max_jobs=settings.PDF_RENDER_MAX_JOBS,
+            timeout=settings.PDF_RENDER_TIMEOUT,
+        )
+        start = time.perf_counter()
+        pool.start()
+        # Пул прогревается асинхронно: первый рендер ждёт инициализацию.
+        pool.render(ingredients=ingredients)
+        self._write('pool start', time.perf_counter() - start)
+        try:
+            self._measure('pool', pool.render, ingredients, options)
+        finally:
+            pool.close()
+        start = time.perf_counter()
+        _render(ingredients)
+        self._write('inline first', time.perf_counter() - start)
+        self._measure('inline', _render, ingredients, options)
+
+    def _measure(self, name: str, render, ingredients, options) -> None:
+        stats = LatencyStats(size=options['repeat'])
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            render(ingredients)
+            stats.add(time.perf_counter() - start)
+        summary = stats.summary()
+        self.stdout.write(
+            f'{name:<14}p50 {summary["p50"]:>8} ms  '
+            f'p99 {summary["p99"]:>8} ms'
+        )
+
+    def _write(self, name: str, seconds: float) -> None:
+        self.stdout.write(f'{name:<14}{seconds * 1000:>12.1f} ms')
@@ -0,0 +1,143 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers.follows import FollowSerializer
+from api.services import (
+    attach_limited_recipes,
+    get_subscriptions_with_recipes,
+)
+from recipes.models.basic import Recipe
+from users.models import Follow
+
+User = get_user_model()
+
+PAGE_SIZE = 6
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает загрузку страницы /api/users/subscriptions/ при '
+        'большом числе подписок с построчной загрузкой рецептов авторов: '
+        'время первой и последней страницы и число запросов. '
+        'Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--recipes-per-author', type=int, default=20)
+        parser.add_argument('--recipes-limit', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed(options)
+            last_page = -(-options['authors'] // PAGE_SIZE)
+            for page in (1, last_page):
+                for name, run in (
+                    ('batched', self._batched),
+                    ('per-author', self._per_author),
+                ):
+                    self._report(
+                        f'{name} page {page}',
+                        lambda: run(user, page, options),
+                        options['repeat'],
+                    )
+            transaction.set_rollback(True)
+
+    def _report(self, name: str, run, repeat: int) -> None:
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f'{name:<24}{statistics.median(timings) * 1000:>10.1f} ms'
+            f'{len(context.captured_queries):>8} queries'
+        )
+
+    @staticmethod
+    def _batched(user: User, page: int, options) -> None:
+        """
+        Путь FollowListAPIView: страница авторов с recipes_count и
+        число и последние рецепты авторов страницы по одному запросу.
+        """
+        start = (page - 1) * PAGE_SIZE
+        authors = attach_limited_recipes(
+            authors=list(
+                get_subscriptions_with_recipes(user=user)[
+                    start:start + PAGE_SIZE
+                ]
+            ),
+            recipes_limit=options['recipes_limit'],
+        )
+        Command._serialize(user, authors, options)
+
+    @staticmethod
+    def _per_author(user: User, page: int, options) -> None:
+        """
+        Прежний путь: рецепты и их число запрашиваются для каждого
+        автора на странице отдельно.
+        """
+        start = (page - 1) * PAGE_SIZE
+        authors = User.objects.filter(followers__user=user).order_by(
+            *User._meta.ordering
+        )[start:start + PAGE_SIZE]
+        Command._serialize(user, authors, options)
+
+    @staticmethod
+    def _serialize(user: User, authors, options) -> None:
+        request = Request(
+            APIRequestFactory().get(
+                '/', {'recipes_limit': options['recipes_limit']}
+            )
+        )
+        request.user = user
+        FollowSerializer(authors, many=True, context={'request': request}).data
+
+    def _seed(self, options) -> User:
+        user = User.objects.create(
+            email='bench@foodgram.local',
+            username='bench',
+            first_name='bench',
+            last_name='bench',
+        )
+        authors = User.objects.bulk_create(
+            User(
+                email=f'author{number}@foodgram.local',
+                username=f'author{number}',
+                first_name='author',
+                last_name='author',
+            )
+            for number in range(options['authors'])
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, following=author) for author in authors
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=author,
+                    name=f'Бенч {author.id} {number}',
+                    text='bench',
+                    image='recipes/bench.jpg',
+                    cooking_time=10,
+                )
+                for author in authors
+                for number in range(options['recipes_per_author'])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(
+            f'Подписок: {len(authors)}, рецептов: '
+            f'{len(authors) * options["recipes_per_author"]}'
+        )
+        return user
@@ -0,0 +1,143 @@
+import statistics
+import time
+from itertools import islice
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from api.filters import TAGS_MATCH_ALL, TAGS_MATCH_ANY, RecipeFilter
+from recipes.models.basic import Recipe, Tag
+
+User = get_user_model()
+
+PAGE_SIZE = 6
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет фильтр рецептов по тегам на сгенерированных данных: '
+        'отсутствие дублей и совпадение с ожидаемым числом рецептов для '
+        'режимов any и all, затем сравнивает время первой страницы и '
+        'подсчёта с прежним JOIN + DISTINCT. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tags = self._seed(options)
+            selections = [tags[:1], tags[:2], tags[1:4]]
+            errors = []
+            for selection in selections:
+                errors += self._check(selection)
+            for selection in selections:
+                self._benchmark(selection, options['repeat'])
+            transaction.set_rollback(True)
+        if errors:
+            raise CommandError('\n'.join(errors))
+        self.stdout.write(self.style.SUCCESS('Дубликатов нет'))
+
+    def _check(self, selection: list[Tag]) -> list[str]:
+        through = Recipe.tags.through.objects.filter(tag__in=selection)
+        expected = {
+            TAGS_MATCH_ANY: through.values('recipe').distinct().count(),
+            TAGS_MATCH_ALL: through.values('recipe')
+            .annotate(matched=Count('tag'))
+            .filter(matched=len(selection))
+            .count(),
+        }
+        errors = []
+        slugs = ', '.join(tag.slug for tag in selection)
+        for match, count in expected.items():
+            queryset = self._filter(selection, match)
+            total = queryset.count()
+            unique = queryset.values('id').distinct().count()
+            self.stdout.write(
+                f'{match:<4}[{slugs}] expected={count} '
+                f'rows={total} unique={unique}'
+            )
+            if total != unique:
+                errors.append(f'{match} [{slugs}]: {total - unique} дублей')
+            if total != count:
+                errors.append(
+                    f'{match} [{slugs}]: {total} рецептов вместо {count}'
+                )
+        return errors
+
+    def _benchmark(self, selection: list[Tag], repeat: int) -> None:
+        slugs = ', '.join(tag.slug for tag in selection)
+        variants = {
+            'join+distinct': lambda: Recipe.objects.filter(
+                tags__slug__in=[tag.slug for tag in selection]
+            ).distinct(),
+            'exists any': lambda: self._filter(selection, TAGS_MATCH_ANY),
+            'exists all': lambda: self._filter(selection, TAGS_MATCH_ALL),
+        }
+        for name, build in variants.items():
+            page, count = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(build().order_by('-pub_date', '-id')[:PAGE_SIZE])
+                page.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                build().count()
+                count.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{name:<14}[{slugs}] '
+                f'page {statistics.median(page) * 1000:8.1f} ms  '
+                f'count {statistics.median(count) * 1000:8.1f} ms'
+            )
+
+    @staticmethod
+    def _filter(selection: list[Tag], match: str):
+        return RecipeFilter(
+            data={
+                'tags': [tag.slug for tag in selection],
+                'tags_match': match,
+            },
+            queryset=Recipe.objects.all(),
+            request=SimpleNamespace(user=None),
+        ).qs
+
+    def _seed(self, options) -> list[Tag]:
+        author = User.objects.create(
+            email='bench@foodgram.local',
+            username='bench',
+            first_name='bench',
+            last_name='bench',
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Бенч {number}', color='#000000', slug=f'bench{number}')
+            for number in range(options['tags'])
+        )
+        recipes = (
+            Recipe(
+                author=author,
+                name=f'Бенч {number}',
+                text='bench',
+                image='recipes/bench.jpg',
+                cooking_time=10,
+            )
+            for number in range(options['recipes'])
+        )
+        through = Recipe.tags.through
+        number = 0
+        while batch := list(islice(recipes, BATCH_SIZE)):
+            Recipe.objects.bulk_create(batch)
+            links = []
+            for recipe in batch:
+                # Один-три тега на рецепт, наборы пересекаются.
+                for index in {0, number % 2, number % 3}:
+                    tag = tags[(number + index) % len(tags)]
+                    links.append(through(recipe_id=recipe.id, tag=tag))
+                number += 1
+            through.objects.bulk_create(links)
+        self.stdout.write(f'Создано рецептов: {number}')
+        return tags
@@ -0,0 +1,343 @@
+import base64
+import difflib
+import json
+import math
+import os
+import re
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from PIL import Image
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from api.cache import ingredients_catalog, recipes_cache, tags_catalog
+from ..seed import seed_dataset
+
+User = get_user_model()
+
+BUDGET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'query_budget.json',
+)
+PASSWORD = 'budget-password'
+TIME_HEADROOM = 3
+MIN_TIME_BUDGET_MS = 20
+
+
+class SerializerTimer:
+    """
+    Суммарное время в Serializer.data. Вложенные сериализаторы,
+    вызванные из SerializerMethodField, входят во время внешнего.
+    """
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self._depth = 0
+
+    @contextmanager
+    def patch(self):
+        original = BaseSerializer.data
+        timer = self
+
+        def data(serializer):
+            timer._depth += 1
+            start = time.perf_counter()
+            try:
+                return original.fget(serializer)
+            finally:
+                timer._depth -= 1
+                if not timer._depth:
+                    timer.seconds += time.perf_counter() - start
+
+        with mock.patch.object(BaseSerializer, 'data', property(data)):
+            yield
+
+
+class SQLTimer:
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        'Вызывает каждый маршрут api/urls.py на тестовых данных, измеряет '
+        'число SQL-запросов, время SQL и время сериализации и сравнивает '
+        'с бюджетом из api/query_budget.json. При превышении числа '
+        'запросов печатает diff запросов и завершается ошибкой; превышение '
+        'времени только выводится, если не указан --strict-time. Данные '
+        'откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=300)
+        parser.add_argument('--ingredients', type=int, default=200)
+        parser.add_argument('--budget', default=BUDGET_PATH)
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Записать текущие измерения в файл бюджета',
+        )
+        parser.add_argument(
+            '--strict-time',
+            action='store_true',
+            help=(
+                'Считать превышение бюджета времени ошибкой. Без флага оно '
+                'только выводится: на общих раннерах CI время нестабильно.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self._update = options['update']
+        self._strict_time = options['strict_time']
+        with open(options['budget'], 'r', encoding='utf-8') as file:
+            budget = json.load(file)
+        errors = self._check_coverage(budget)
+        with self._environment():
+            dataset = seed_dataset(
+                users=options['users'],
+                recipes=options['recipes'],
+                ingredients=options['ingredients'],
+            )
+            dataset.user.set_password(PASSWORD)
+            dataset.user.save()
+            admin = User.objects.create(
+                email='budget-admin@foodgram.local',
+                username='budget-admin',
+                first_name='admin',
+                last_name='admin',
+                is_staff=True,
+            )
+            clients = {
+                'user': APIClient(),
+                'admin': APIClient(),
+                'anonymous': APIClient(),
+            }
+            clients['user'].force_authenticate(dataset.user)
+            clients['admin'].force_authenticate(admin)
+            placeholders = self._get_placeholders(dataset)
+            self.stdout.write(
+                f'{"case":<28}{"status":>7}{"queries":>12}'
+                f'{"sql ms":>16}{"serializer ms":>18}'
+            )
+            for case in budget['cases']:
+                errors += self._run_case(case, clients, placeholders)
+        if options['update']:
+            with open(options['budget'], 'w', encoding='utf-8') as file:
+                json.dump(budget, file, ensure_ascii=False, indent=2)
+                file.write('\n')
+            self.stdout.write(f'Бюджет записан в {options["budget"]}')
+            return
+        if errors:
+            raise CommandError('\n'.join(errors))
+        self.stdout.write(self.style.SUCCESS('Бюджет соблюдён'))
+
+    def _run_case(self, case: dict, clients: dict, placeholders: dict):
+        tags_catalog.bump()
+        ingredients_catalog.bump()
+        recipes_cache.bump()
+        client = clients[case.get('client', 'user')]
+        url = case['url'].format(**placeholders)
+        data = self._get_data(case.get('data'), placeholders)
+        sql_timer = SQLTimer()
+        serializer_timer = SerializerTimer()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            with connection.execute_wrapper(sql_timer):
+                with serializer_timer.patch():
+                    response = getattr(client, case['method'])(
+                        url, data, format=case.get('format', 'json')
+                    )
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+        total = time.perf_counter() - start
+        queries = [
+            self._normalize(query['sql'])
+            for query in context.captured_queries
+        ]
+        measured = {
+            'queries': len(queries),
+            'sql_ms': sql_timer.seconds * 1000,
+            'serializer_ms': serializer_timer.seconds * 1000,
+        }
+        limits = case.setdefault('budget', {})
+        self.stdout.write(
+            f'{case["name"]:<28}{response.status_code:>7}'
+            f'{measured["queries"]:>6}/{limits.get("queries", "-"):<5}'
+            f'{measured["sql_ms"]:>8.1f}/{limits.get("sql_ms", "-"):<7}'
+            f'{measured["serializer_ms"]:>10.1f}/'
+            f'{limits.get("serializer_ms", "-"):<7}'
+            f'{total * 1000:>8.1f} ms'
+        )
+        if self._update:
+            if response.status_code >= 400:
+                self.stderr.write(
+                    f'{case["name"]}: ответ {response.status_code}, '
+                    f'проверьте клиента и данные сценария'
+                )
+            case['status'] = response.status_code
+            case['budget'] = {
+                'queries': measured['queries'],
+                'sql_ms': self._get_time_budget(measured['sql_ms']),
+                'serializer_ms': self._get_time_budget(
+                    measured['serializer_ms']
+                ),
+            }
+            case['queries'] = queries
+            return []
+        errors = []
+        if response.status_code != case.get('status'):
+            errors.append(
+                f'{case["name"]}: статус {response.status_code} '
+                f'вместо {case.get("status")}'
+            )
+        for metric, value in measured.items():
+            if metric not in limits or value <= limits[metric]:
+                continue
+            message = (
+                f'{case["name"]}: {metric} '
+                f'{round(value, 1)} > {limits[metric]}'
+            )
+            if metric == 'queries' or self._strict_time:
+                errors.append(message)
+            else:
+                self.stderr.write(message)
+        if measured['queries'] > limits.get('queries', math.inf):
+            self.stdout.write(
+                '\n'.join(
+                    difflib.unified_diff(
+                        case.get('queries', []),
+                        queries,
+                        fromfile=f'{case["name"]} (бюджет)',
+                        tofile=f'{case["name"]} (сейчас)',
+                        lineterm='',
+                    )
+                )
+            )
+        return errors
+
+    def _check_coverage(self, budget: dict) -> list[str]:
+        """
+        Каждый маршрут api/urls.py должен быть покрыт хотя бы одним
+        случаем или явно исключён с причиной.
+        """
+        covered = {
+            self._normalize_route(route)
+            for route in budget.get('excluded', {})
+        }
+        resolver = get_resolver()
+        for case in budget['cases']:
+            path = case['url'].split('?')[0].format(
+                **{name: 1 for name in self._get_placeholder_names(case)}
+            )
+            covered.add(self._normalize_route(resolver.resolve(path).route))
+        routes = {
+            self._normalize_route(f'api/{route}')
+            for route in self._get_routes(get_resolver('api.urls'))
+        }
+        return [
+            f'Маршрут без бюджета: {route}'
+            for route in sorted(routes - covered)
+        ]
+
+    def _get_routes(self, resolver: URLResolver, prefix: str = ''):
+        for pattern in resolver.url_patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                yield from self._get_routes(pattern, route)
+            elif '(?P<format>' not in route:
+                yield route
+
+    @staticmethod
+    def _normalize_route(route: str) -> str:
+        # ResolverMatch.route склеивает регулярные выражения без '^'.
+        return route.replace('^', '')
+
+    @staticmethod
+    def _get_placeholder_names(case: dict) -> list[str]:
+        return re.findall(r'{(\w+)}', case['url'])
+
+    @staticmethod
+    def _get_placeholders(dataset) -> dict:
+        # Автор без подписки и чужой рецепт вне избранного и корзины.
+        not_followed = dataset.users[-1]
+        return {
+            'user': dataset.user.id,
+            'author': not_followed.id,
+            'recipe': dataset.recipes[1].id,
+            'tag': dataset.tags[0].id,
+            'tag_slug': dataset.tags[0].slug,
+            'ingredient': dataset.ingredients[0].id,
+            'email': dataset.user.email,
+            'password': PASSWORD,
+            'image': _get_image(),
+        }
+
+    @staticmethod
+    def _get_data(data, placeholders: dict):
+        if isinstance(data, str):
+            return placeholders[data[1:-1]] if data[:1] == '{' else data
+        if isinstance(data, dict):
+            return {
+                key: Command._get_data(value, placeholders)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [Command._get_data(value, placeholders) for value in data]
+        return data
+
+    @staticmethod
+    def _get_time_budget(milliseconds: float) -> int:
+        return max(
+            MIN_TIME_BUDGET_MS, math.ceil(milliseconds * TIME_HEADROOM)
+        )
+
+    @staticmethod
+    def _normalize(sql: str) -> str:
+        # Имена точек сохранения содержат id потока и счётчик.
+        sql = re.sub(r'SAVEPOINT "\w+"', 'SAVEPOINT ?', sql)
+        sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+        sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+        return re.sub(r'\((?:\?, )+\?\)', '(...)', sql)
+
+    @contextmanager
+    def _environment(self):
+        with ExitStack() as stack:
+            media_root = stack.enter_context(tempfile.TemporaryDirectory())
+            stack.enter_context(
+                override_settings(
+                    MEDIA_ROOT=media_root,
+                    SHOPPING_LIST_CACHE_DIR=os.path.join(
+                        media_root, 'shopping_lists'
+                    ),
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                )
+            )
+            stack.enter_context(transaction.atomic())
+            yield
+            transaction.set_rollback(True)
+
+
+def _get_image() -> str:
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), 'white').save(buffer, format='PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+
+from recipes.models.basic import Ingredient, Recipe, Tag
+from recipes.models.m2m import Favorite, IngredientAmount, ShoppingCart
+from users.models import Follow
+
+User = get_user_model()
+
+TAGS_NUMBER = 10
+INGREDIENTS_PER_RECIPE = 5
+FOLLOWING_NUMBER = 30
+
+
+def seed_dataset(
+    users: int, recipes: int, ingredients: int
+) -> SimpleNamespace:
+    """
+    Тестовые данные для проверочных команд: рецепты распределены по
+    авторам, у каждого два тега и пять ингредиентов. Первый
+    пользователь подписан на часть авторов, часть рецептов у него в
+    избранном и в списке покупок. Сигналы не вызываются.
+    """
+    users = User.objects.bulk_create(
+        User(
+            email=f'seed{number}@foodgram.local',
+            username=f'seed{number}',
+            first_name='seed',
+            last_name='seed',
+        )
+        for number in range(users)
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'Тег {number}', color='#000000', slug=f'seed{number}')
+        for number in range(TAGS_NUMBER)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(ingredients)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            author=users[number % len(users)],
+            name=f'Рецепт {number}',
+            text='seed',
+            image='recipes/seed.jpg',
+            cooking_time=10,
+        )
+        for number in range(recipes)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tags[tag_number % len(tags)])
+        for number, recipe in enumerate(recipes)
+        for tag_number in (number, number + 1)
+    )
+    IngredientAmount.objects.bulk_create(
+        IngredientAmount(
+            recipe=recipe,
+            ingredient=ingredients[(number + shift) % len(ingredients)],
+            amount=shift + 1,
+        )
+        for number, recipe in enumerate(recipes)
+        for shift in range(INGREDIENTS_PER_RECIPE)
+    )
+    user = users[0]
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=recipe) for recipe in recipes[::50]
+    )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe=recipe) for recipe in recipes[::40]
+    )
+    Follow.objects.bulk_create(
+        Follow(user=user, following=author)
+        for author in users[1:FOLLOWING_NUMBER]
+    )
+    return SimpleNamespace(
+        user=user,
+        users=users,
+        tags=tags,
+        ingredients=ingredients,
+        recipes=recipes,
+    )
@@ -1,5 +1,242 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qs, urlencode
+
+from django.conf import settings
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.models.basic import Recipe
+
+Cursor = namedtuple('Cursor', ['pub_date', 'pk', 'reverse'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который на больших таблицах PostgreSQL берёт число
+    строк из оценки планировщика вместо COUNT(*): для запроса без
+    условий — pg_class.reltuples, для отфильтрованного — Plan Rows из
+    EXPLAIN. Ниже COUNT_ESTIMATE_THRESHOLD считается точно; EXPLAIN
+    выполняется, только если таблица больше порога.
+    """
+
+    is_approximate = False
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._estimate()
+        if estimate is None or estimate < settings.COUNT_ESTIMATE_THRESHOLD:
+            return super().count
+        self.is_approximate = True
+        return estimate
+
+    def validate_number(self, number) -> int:
+        # Оценка может быть меньше реального числа строк, поэтому
+        # страницы за её пределами остаются доступными по прямому номеру.
+        if not self.count or not self.is_approximate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number) -> Page:
+        number = self.validate_number(number)
+        if not self.is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+    def _estimate(self) -> int | None:
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        query = queryset.query
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # reltuples = -1, пока таблица ни разу не анализировалась.
+            if row is None or row[0] < settings.COUNT_ESTIMATE_THRESHOLD:
+                return None
+            if not query.has_filters() and not query.distinct:
+                return int(row[0])
+            sql, params = query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class RecipePageNumberPagination(CustomPageNumberPagination):
+    """
+    Постраничная лента рецептов: на большой таблице count берётся из
+    оценки планировщика, о чём сообщает count_is_approximate.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data) -> Response:
+        response = super().get_paginated_response(data)
+        response.data['count_is_approximate'] = (
+            self.page.paginator.is_approximate
+        )
+        return response
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_approximate'] = {
+            'type': 'boolean',
+        }
+        return response_schema
+
+
+class RecipeCursorPagination(BasePagination):
+    """
+    Keyset-пагинация ленты рецептов по паре (pub_date, id).
+
+    Страница выбирается условием на ключ последней записи предыдущей
+    страницы, а не OFFSET, и без COUNT(*), поэтому время ответа не
+    зависит от номера страницы, а новые рецепты не сдвигают уже
+    открытую ленту. Порядок совпадает с Recipe.Meta.ordering,
+    id разрешает совпадения pub_date.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view=None
+    ) -> list:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor.reverse
+        if cursor is not None:
+            queryset = queryset.filter(self._get_condition(cursor))
+        ordering = ('pub_date', 'id') if reverse else ('-pub_date', '-id')
+        results = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+        self.has_next = has_more if not reverse else bool(results)
+        self.has_previous = cursor is not None and (has_more or not reverse)
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(
+            OrderedDict(
+                [
+                    ('next', self.get_next_link()),
+                    ('previous', self.get_previous_link()),
+                    ('results', data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, recipe: Recipe, reverse: bool) -> str:
+        position = {'p': recipe.pub_date.isoformat(), 'i': recipe.pk}
+        if reverse:
+            position['r'] = 1
+        encoded = b64encode(urlencode(position).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encoded,
+        )
+
+    def decode_cursor(self, request: Request) -> Cursor | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = parse_qs(
+                b64decode(encoded.encode()).decode(), strict_parsing=True
+            )
+            pub_date = parse_datetime(position['p'][0])
+            pk = int(position['i'][0])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(pub_date=pub_date, pk=pk, reverse='r' in position)
+
+    @staticmethod
+    def _get_condition(cursor: Cursor) -> Q:
+        # Условие pub_date <= p вынесено отдельно, чтобы индекс
+        # (-pub_date, -id) использовался как диапазон.
+        if cursor.reverse:
+            return Q(pub_date__gte=cursor.pub_date) & (
+                Q(pub_date__gt=cursor.pub_date) | Q(id__gt=cursor.pk)
+            )
+        return Q(pub_date__lte=cursor.pub_date) & (
+            Q(pub_date__lt=cursor.pub_date) | Q(id__lt=cursor.pk)
+        )
@@ -0,0 +1,101 @@
+import json
+
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from PIL import ImageFile
+from rest_framework import parsers, serializers
+
+from .fields import validate_image_dimensions, validate_image_size
+
+
+class ImageLimitHandler(FileUploadHandler):
+    """
+    Проверяет изображения рецепта по мере чтения multipart-запроса:
+    загрузка прерывается, как только превышен размер файла или из
+    заголовка изображения стало известно слишком большое разрешение.
+    Сами данные передаются следующим обработчикам без изменений.
+    """
+
+    HEADER_LIMIT = 256 * 1024
+
+    def __init__(self, request=None, fields: tuple[str] = ('image',)):
+        super().__init__(request)
+        self._fields = fields
+        self._received = 0
+        self._image_parser = None
+
+    def new_file(self, field_name, *args, **kwargs) -> None:
+        super().new_file(field_name, *args, **kwargs)
+        self._received = 0
+        self._image_parser = None
+        if field_name in self._fields:
+            self._validate(validate_image_size, self.content_length or 0)
+            self._image_parser = ImageFile.Parser()
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> bytes:
+        if self.field_name not in self._fields:
+            return raw_data
+        self._received += len(raw_data)
+        self._validate(validate_image_size, self._received)
+        if self._received > self.HEADER_LIMIT:
+            self._image_parser = None
+        if self._image_parser is not None:
+            try:
+                self._image_parser.feed(raw_data)
+            except OSError:
+                self._image_parser = None
+            else:
+                if self._image_parser.image is not None:
+                    self._validate(
+                        validate_image_dimensions,
+                        *self._image_parser.image.size,
+                    )
+                    self._image_parser = None
+        return raw_data
+
+    def file_complete(self, file_size: int) -> None:
+        self._image_parser = None
+
+    def _validate(self, validator, *args) -> None:
+        try:
+            validator(*args)
+        except serializers.ValidationError as error:
+            raise serializers.ValidationError({self.field_name: error.detail})
+
+
+class RecipeMultiPartParser(parsers.MultiPartParser):
+    """
+    multipart/form-data для создания и изменения рецепта: изображение
+    передаётся файлом и пишется на диск частями, вложенные поля
+    (ingredients, tags) передаются строкой JSON.
+    """
+
+    json_fields = ('ingredients', 'tags')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']._request
+        request.upload_handlers = [
+            ImageLimitHandler(request),
+            *request.upload_handlers,
+        ]
+        result = super().parse(stream, media_type, parser_context)
+        return parsers.DataAndFiles(
+            self._decode(result.data, result.files), MultiValueDict()
+        )
+
+    def _decode(self, data: QueryDict, files: MultiValueDict) -> dict:
+        decoded = {**data.dict(), **files.dict()}
+        for field in self.json_fields:
+            values = data.getlist(field)
+            if len(values) == 1:
+                try:
+                    value = json.loads(values[0])
+                except ValueError:
+                    value = None
+                if isinstance(value, list):
+                    decoded[field] = value
+                    continue
+            if values:
+                decoded[field] = values
+        return decoded
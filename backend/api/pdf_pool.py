@@ -0,0 +1,146 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.pool import Pool
+from statistics import quantiles
+
+import django
+from django.conf import settings
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up() -> None:
+    """
+    Инициализация процесса рендера: настройка Django, компиляция
+    шаблона, поиск шрифтов и разбор CSS на пустом документе.
+    """
+    django.setup()
+    from .logic import get_pdf
+
+    get_template('pdf_template.html')
+    get_pdf(context={'ingredients': []})
+
+
+def _render(ingredients: list[tuple]) -> bytes:
+    from .logic import get_pdf
+
+    return get_pdf(context={'ingredients': ingredients})
+
+
+class LatencyStats:
+    """
+    Скользящее окно длительностей рендера в миллисекундах.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._values = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._values.append(seconds * 1000)
+
+    def summary(self) -> dict:
+        values = list(self._values)
+        if len(values) < 2:
+            return {'count': len(values), 'p50': None, 'p99': None}
+        percentiles = quantiles(values, n=100, method='inclusive')
+        return {
+            'count': len(values),
+            'p50': round(percentiles[49], 2),
+            'p99': round(percentiles[98], 2),
+        }
+
+
+class PdfRendererPool:
+    """
+    Пул долгоживущих процессов WeasyPrint.
+
+    Процессы запускаются через spawn, поэтому WeasyPrint не попадает в
+    память веб-воркера, а шрифты и шаблон загружаются один раз на
+    процесс. После max_jobs задач процесс перезапускается. Если пул не
+    ответил за timeout секунд, документ рендерится в текущем процессе.
+    """
+
+    def __init__(self, size: int, max_jobs: int, timeout: int) -> None:
+        self._size = size
+        self._max_jobs = max_jobs
+        self._timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = LatencyStats(size=settings.PDF_RENDER_STATS_SIZE)
+        self.timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self._size > 0 and not multiprocessing.current_process().daemon
+        )
+
+    def render(self, ingredients: list[tuple]) -> bytes:
+        start = time.perf_counter()
+        if not self.enabled:
+            content = _render(ingredients)
+            self.stats.add(time.perf_counter() - start)
+            return content
+        job = self._get_pool().apply_async(_render, (ingredients,))
+        try:
+            content = job.get(timeout=self._timeout)
+        except multiprocessing.TimeoutError:
+            self.timeouts += 1
+            logger.warning(
+                'Пул рендера PDF не ответил за %s с, рендер в процессе %s',
+                self._timeout,
+                os.getpid(),
+            )
+            return _render(ingredients)
+        self.stats.add(time.perf_counter() - start)
+        return content
+
+    def start(self) -> None:
+        """
+        Запускает и прогревает процессы заранее, до первого запроса.
+        """
+        if self.enabled:
+            self._get_pool()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+    def summary(self) -> dict:
+        """
+        Статистика только этого процесса и только его режима рендера:
+        у каждого веб-воркера своё окно длительностей.
+        """
+        return {
+            'pid': os.getpid(),
+            'mode': 'pool' if self.enabled else 'inline',
+            'timeouts': self.timeouts,
+            **self.stats.summary(),
+        }
+
+    def _get_pool(self) -> Pool:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(
+                    processes=self._size,
+                    initializer=_warm_up,
+                    maxtasksperchild=self._max_jobs,
+                )
+                atexit.register(self.close)
+            return self._pool
+
+
+pdf_renderer = PdfRendererPool(
+    size=settings.PDF_RENDER_POOL_SIZE,
+    max_jobs=settings.PDF_RENDER_MAX_JOBS,
+    timeout=settings.PDF_RENDER_TIMEOUT,
+)
@@ -0,0 +1,124 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from django.db.models import Count
+
+from recipes.models.basic import Ingredient
+from .cache import Catalog, ingredients_catalog, ingredients_usage
+
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+class IngredientIndex:
+    """
+    Префиксный индекс ингредиентов в памяти процесса.
+
+    Хранит отсортированный список (название, id) и количество рецептов
+    для каждого ингредиента. Поиск по префиксу — два бинарных поиска,
+    результат ранжируется по популярности ингредиента. Индекс
+    перестраивается при смене версии справочника, а популярность
+    пересчитывается при смене версии usage — её меняют изменения
+    рецептов и их ингредиентов.
+    """
+
+    def __init__(self, catalog: Catalog, usage: Catalog) -> None:
+        self._catalog = catalog
+        self._usage_catalog = usage
+        self._lock = threading.Lock()
+        self._entries: list[tuple[str, int]] = []
+        self._ingredients: dict[int, dict] = {}
+        self._usage: dict[int, int] = {}
+        self._version = None
+        self._usage_version = None
+
+    def search(self, prefix: str, limit: int) -> list[dict]:
+        self._ensure_fresh()
+        prefix = prefix.strip().lower()
+        entries = self._entries
+        start = bisect_left(entries, (prefix,))
+        end = bisect_left(entries, (prefix + PREFIX_UPPER_BOUND,), lo=start)
+        usage = self._usage
+        best = heapq.nsmallest(
+            limit,
+            entries[start:end],
+            key=lambda entry: (-usage.get(entry[1], 0), entry),
+        )
+        return [self._ingredients[pk] for _, pk in best]
+
+    def rebuild(self) -> None:
+        version = self._catalog.version()
+        ingredients = {
+            ingredient['id']: ingredient
+            for ingredient in Ingredient.objects.values(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+        entries = sorted(
+            (ingredient['name'].lower(), pk)
+            for pk, ingredient in ingredients.items()
+        )
+        with self._lock:
+            self._entries = entries
+            self._ingredients = ingredients
+            self._version = version
+        self.refresh_usage()
+
+    def refresh_usage(self) -> None:
+        usage_version = self._usage_catalog.version()
+        usage = dict(
+            Ingredient.objects.filter(amounts__isnull=False)
+            .annotate(usage=Count('amounts'))
+            .values_list('id', 'usage')
+        )
+        with self._lock:
+            self._usage = usage
+            self._usage_version = usage_version
+
+    def add(self, ingredient: Ingredient, previous: str, current: str) -> None:
+        """
+        Точечное обновление индекса. previous и current — версии
+        справочника до и после изменения: если индекс отстал от previous,
+        он будет перестроен целиком при следующем поиске.
+        """
+        with self._lock:
+            if self._version != previous:
+                return
+            self._version = current
+            self._discard(ingredient.pk)
+            self._ingredients[ingredient.pk] = {
+                'id': ingredient.pk,
+                'name': ingredient.name,
+                'measurement_unit': ingredient.measurement_unit,
+            }
+            insort(self._entries, (ingredient.name.lower(), ingredient.pk))
+
+    def remove(self, pk: int, previous: str, current: str) -> None:
+        with self._lock:
+            if self._version != previous:
+                return
+            self._version = current
+            self._discard(pk)
+
+    def _discard(self, pk: int) -> None:
+        ingredient = self._ingredients.pop(pk, None)
+        if ingredient is None:
+            return
+        entry = (ingredient['name'].lower(), pk)
+        position = bisect_left(self._entries, entry)
+        if (
+            position < len(self._entries)
+            and self._entries[position] == entry
+        ):
+            del self._entries[position]
+
+    def _ensure_fresh(self) -> None:
+        if self._version != self._catalog.version():
+            self.rebuild()
+        elif self._usage_version != self._usage_catalog.version():
+            self.refresh_usage()
+
+
+ingredient_index = IngredientIndex(
+    catalog=ingredients_catalog, usage=ingredients_usage
+)
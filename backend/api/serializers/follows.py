@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 
-from users.models import Follow
+from ..services import get_subscriptions
 from .recipes import ShortRecipeSerializer
 
 User = get_user_model()
@@ -31,20 +31,21 @@ class FollowSerializer(serializers.ModelSerializer):
         serializer_or_field=ShortRecipeSerializer(many=True)
     )
     def get_recipes(self, obj: User) -> dict:
-        request = self.context.get('request')
-        recipes = obj.recipes.all()
-        recipes_limit = request.query_params.get('recipes_limit')
-        if recipes_limit:
-            recipes = recipes[: int(recipes_limit)]
+        recipes = getattr(obj, 'limited_recipes', None)
+        if recipes is None:
+            request = self.context.get('request')
+            recipes = obj.recipes.all()
+            recipes_limit = request.query_params.get('recipes_limit')
+            if recipes_limit:
+                recipes = recipes[: int(recipes_limit)]
         return ShortRecipeSerializer(recipes, many=True).data
 
     @swagger_serializer_method(serializer_or_field=serializers.BooleanField)
     def get_is_subscribed(self, obj: User) -> bool:
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=user, following=obj).exists()
+        return obj.id in get_subscriptions(self.context.get('request'))
 
     @swagger_serializer_method(serializer_or_field=serializers.IntegerField)
     def get_recipes_count(self, obj: User) -> int:
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
@@ -1,8 +1,10 @@
+from django.core.files.storage import default_storage
 from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 
+from recipes.images import release_variants, schedule_image_variants
 from recipes.models.basic import Recipe, Tag
 from recipes.models.m2m import Favorite, ShoppingCart, IngredientAmount
 from .ingredients import (
@@ -10,19 +12,48 @@ from .ingredients import (
     CreateIngredientAmountSerializer,
 )
 from .tags import TagSerializer
+from ..fields import RecipeImageField
 from ..serializers.users import CustomUserSerializer
 
 
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Абсолютные ссылки на уменьшенные копии изображения:
+    {'thumbnail': {'jpeg': url, 'webp': url}, 'card': ..., 'full': ...}.
+    Пока копии не построены, возвращается пустой словарь.
+    """
+
+    def to_representation(self, value: dict) -> dict:
+        request = self.context.get('request')
+        return {
+            variant: {
+                image_format: self._get_url(request, path)
+                for image_format, path in formats.items()
+            }
+            for variant, formats in value.items()
+        }
+
+    @staticmethod
+    def _get_url(request, path: str) -> str:
+        url = default_storage.url(path)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class RecipeListSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     author = CustomUserSerializer()
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
@@ -41,11 +72,13 @@ class RecipeListSerializer(serializers.ModelSerializer):
         serializer_or_field=IngredientAmountSerializer(many=True)
     )
     def get_ingredients(self, obj: Recipe) -> dict:
-        queryset = IngredientAmount.objects.filter(recipe=obj)
+        queryset = obj.amounts.all()
         return IngredientAmountSerializer(queryset, many=True).data
 
     @swagger_serializer_method(serializer_or_field=serializers.BooleanField)
     def get_is_favorited(self, obj: Recipe) -> bool:
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
         if user.is_anonymous:
             return False
@@ -53,6 +86,8 @@ class RecipeListSerializer(serializers.ModelSerializer):
 
     @swagger_serializer_method(serializer_or_field=serializers.BooleanField)
     def get_is_in_shopping_cart(self, obj: Recipe) -> bool:
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         if user.is_anonymous:
             return False
@@ -60,7 +95,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField()
     ingredients = CreateIngredientAmountSerializer(many=True)
     tags = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
@@ -99,6 +134,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=request.user, **validated_data)
         recipe.tags.set(tags_data)
         self.bulk_create(recipe, ingredients_data)
+        schedule_image_variants(recipe)
         return recipe
 
     @transaction.atomic
@@ -108,6 +144,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         IngredientAmount.objects.filter(recipe=instance).delete()
         self.bulk_create(instance, ingredients_data)
         instance.tags.set(tags_data)
+        if 'image' in validated_data:
+            name = instance.image.name
+            variants = instance.image_variants
+            validated_data['image_variants'] = {}
+            transaction.on_commit(lambda: release_variants(name, variants))
+            schedule_image_variants(instance)
         return super().update(instance, validated_data)
 
     def validate_cooking_time(self, value) -> int:
@@ -3,7 +3,7 @@ from djoser.serializers import UserSerializer as DjoserUserSerializer
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 
-from users.models import Follow
+from ..services import get_subscriptions
 
 User = get_user_model()
 
@@ -25,7 +25,4 @@ class CustomUserSerializer(DjoserUserSerializer):
 
     @swagger_serializer_method(serializer_or_field=serializers.BooleanField)
     def get_is_subscribed(self, obj: User) -> bool:
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=user, following=obj.id).exists()
+        return obj.id in get_subscriptions(self.context.get('request'))
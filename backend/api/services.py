@@ -1,17 +1,35 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.db.models import QuerySet
-from django.db.models import F, Sum
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from rest_framework.request import Request
 
-from recipes.models.m2m import IngredientAmount
+from recipes.models.basic import Ingredient, Recipe
+from recipes.models.m2m import Favorite, IngredientAmount, ShoppingCart
+from users.models import Follow
 
 
 User = get_user_model()
 
 
-def get_list_ingredients(user: User) -> QuerySet:
+def get_list_ingredients(user_id: int) -> QuerySet:
 
     ingredients = (
-        IngredientAmount.objects.filter(recipe__carts__user=user)
+        IngredientAmount.objects.filter(recipe__carts__user_id=user_id)
         .values(
             name=F('ingredient__name'),
             measurement_unit=F('ingredient__measurement_unit'),
@@ -20,5 +38,141 @@ def get_list_ingredients(user: User) -> QuerySet:
         .values_list(
             'ingredient__name', 'amount', 'ingredient__measurement_unit'
         )
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
     )
     return ingredients
+
+
+def get_recipes_with_relations(user: User) -> QuerySet:
+    """
+    Рецепты с автором, тегами, ингредиентами и флагами текущего
+    пользователя: число запросов не зависит от размера страницы.
+    """
+    queryset = Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'amounts',
+            queryset=IngredientAmount.objects.select_related('ingredient'),
+        ),
+    )
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_favorited=Value(False), is_in_shopping_cart=Value(False)
+        )
+    return queryset.annotate(
+        is_favorited=Exists(
+            Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_in_shopping_cart=Exists(
+            ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+    )
+
+
+def get_subscriptions(request: Request | None) -> set[int]:
+    """
+    Id авторов, на которых подписан текущий пользователь.
+    Загружаются один раз за запрос и переиспользуются всеми сериализаторами.
+    """
+    if request is None or request.user.is_anonymous:
+        return set()
+    subscriptions = getattr(request, '_subscriptions', None)
+    if subscriptions is None:
+        subscriptions = set(
+            Follow.objects.filter(user=request.user).values_list(
+                'following_id', flat=True
+            )
+        )
+        request._subscriptions = subscriptions
+    return subscriptions
+
+
+def get_authors_recipes(
+    author_ids: list[int], recipes_limit: int | None
+) -> QuerySet:
+    """
+    Рецепты указанных авторов, не более recipes_limit последних рецептов
+    на автора. Ограничение считается одним запросом через ROW_NUMBER()
+    с разбиением по автору только среди авторов текущей страницы.
+    """
+    recipes = Recipe.objects.filter(author__in=author_ids)
+    if recipes_limit is None:
+        return recipes
+    ranked = (
+        recipes.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=F('pub_date').desc(),
+            )
+        )
+        .order_by()
+        .values('pk', 'row_number')
+    )
+    sql, params = ranked.query.sql_with_params()
+    # Условие на авторов повторено снаружи: иначе внешний запрос
+    # читает всю таблицу рецептов ради семи-соединения с ranked.
+    return recipes.filter(
+        pk__in=RawSQL(
+            f'SELECT "ranked"."id" FROM ({sql}) AS "ranked" '
+            'WHERE "ranked"."row_number" <= %s',
+            (*params, recipes_limit),
+        )
+    )
+
+
+def get_subscriptions_with_recipes(user: User) -> QuerySet:
+    """
+    Подписки пользователя. Число рецептов и последние рецепты
+    загружаются для уже выбранной страницы в attach_limited_recipes.
+    """
+    return User.objects.filter(followers__user=user).order_by(
+        *User._meta.ordering
+    )
+
+
+def attach_limited_recipes(
+    authors: list[User], recipes_limit: int | None
+) -> list[User]:
+    """
+    Число рецептов и последние рецепты авторов страницы: по одному
+    запросу на страницу, а не на всех авторов из подписок.
+    """
+    recipes = {author.id: [] for author in authors}
+    counts = dict(
+        Recipe.objects.filter(author__in=list(recipes))
+        .values('author')
+        .annotate(count=Count('pk'))
+        .order_by()
+        .values_list('author', 'count')
+    )
+    queryset = get_authors_recipes(
+        author_ids=list(recipes), recipes_limit=recipes_limit
+    )
+    for recipe in queryset.order_by('-pub_date'):
+        recipes[recipe.author_id].append(recipe)
+    for author in authors:
+        author.recipes_count = counts.get(author.id, 0)
+        author.limited_recipes = recipes[author.id]
+    return authors
+
+
+def search_ingredients_fuzzy(name: str, limit: int) -> QuerySet:
+    """
+    Поиск ингредиентов с опечатками через pg_trgm.
+    Сначала совпадения по префиксу, затем по убыванию схожести.
+    """
+    name = name.strip().lower()
+    return (
+        Ingredient.objects.filter(
+            Q(name__startswith=name) | Q(name__trigram_word_similar=name)
+        )
+        .annotate(
+            is_prefix=Case(
+                When(name__startswith=name, then=Value(True)),
+                default=Value(False),
+            ),
+            similarity=TrigramWordSimilarity(name, 'name'),
+        )
+        .order_by('-is_prefix', '-similarity', 'name')[:limit]
+    )
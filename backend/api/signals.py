@@ -0,0 +1,143 @@
+import logging
+from typing import Callable
+
+from celery.signals import task_postrun
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from recipes.models.basic import Ingredient, Recipe, Tag
+from recipes.models.m2m import IngredientAmount
+from recipes.signals import ingredients_created
+from recipes.tasks import build_image_variants
+from .cache import (
+    ingredients_catalog,
+    ingredients_usage,
+    recipes_cache,
+    tags_catalog,
+)
+from .search import ingredient_index
+from .serializers.users import CustomUserSerializer
+
+User = get_user_model()
+
+AUTHOR_FIELDS = set(CustomUserSerializer.Meta.fields)
+
+logger = logging.getLogger(__name__)
+
+
+def on_commit_safe(callback: Callable) -> None:
+    """
+    Выполняет callback после фиксации транзакции. Недоступный Redis не
+    должен превращать уже сохранённую запись в ответ 500: версия кэша
+    сменится при следующем изменении.
+    """
+
+    def run() -> None:
+        try:
+            callback()
+        except RedisError:
+            logger.exception('Не удалось обновить версию кэша: %r', callback)
+
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_index(
+    sender, instance: Ingredient = None, **kwargs
+) -> None:
+    """
+    Смена версии справочника ингредиентов и точечное обновление
+    префиксного индекса после фиксации транзакции.
+    """
+
+    def update() -> None:
+        previous = ingredients_catalog.version()
+        ingredient_index.add(
+            instance, previous=previous, current=ingredients_catalog.bump()
+        )
+
+    on_commit_safe(update)
+
+
+@receiver(post_delete, sender=Ingredient)
+def remove_from_ingredient_index(
+    sender, instance: Ingredient = None, **kwargs
+) -> None:
+    pk = instance.pk
+
+    def remove() -> None:
+        previous = ingredients_catalog.version()
+        ingredient_index.remove(
+            pk, previous=previous, current=ingredients_catalog.bump()
+        )
+
+    on_commit_safe(remove)
+
+
+@receiver(ingredients_created)
+def invalidate_ingredients_catalog(sender, **kwargs) -> None:
+    """
+    Импорт рецептов создаёт ингредиенты через bulk_create без сигналов.
+    """
+    on_commit_safe(ingredients_catalog.bump)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def invalidate_ingredients_usage(sender, **kwargs) -> None:
+    """
+    Популярность ингредиентов меняется вместе с рецептами. Ингредиенты
+    рецепта создаются через bulk_create без сигналов, поэтому
+    учитывается и сохранение самого рецепта.
+    """
+    on_commit_safe(ingredients_usage.bump)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags_catalog(sender, **kwargs) -> None:
+    on_commit_safe(tags_catalog.bump)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=User)
+def invalidate_recipes_cache(sender, **kwargs) -> None:
+    """
+    Новое поколение кэша ответов списка и карточки рецептов.
+    """
+    on_commit_safe(recipes_cache.bump)
+
+
+@receiver(post_save, sender=User)
+def invalidate_recipes_cache_on_author_change(
+    sender, created: bool = False, update_fields=None, **kwargs
+) -> None:
+    """
+    Данные автора входят в ответ. Новый пользователь ещё без рецептов,
+    а вход обновляет только last_login: такие сохранения кэш не
+    сбрасывают.
+    """
+    if created:
+        return
+    if update_fields is not None and not AUTHOR_FIELDS & set(update_fields):
+        return
+    on_commit_safe(recipes_cache.bump)
+
+
+@task_postrun.connect(sender=build_image_variants)
+def invalidate_recipes_cache_on_variants(**kwargs) -> None:
+    """
+    Задача записывает варианты изображения через update() без сигналов.
+    """
+    on_commit_safe(recipes_cache.bump)
@@ -0,0 +1,12 @@
+from config.celery_config import app
+from .logic import render_to_pdf_cache
+from .services import get_list_ingredients
+
+
+@app.task(name='api.tasks.render_shopping_list')
+def render_shopping_list(user_id: int) -> dict:
+    """
+    Фоновая генерация PDF списка покупок.
+    """
+    ingredients = list(get_list_ingredients(user_id=user_id))
+    return {'user': user_id, 'file': render_to_pdf_cache(ingredients)}
@@ -0,0 +1,440 @@
+import json
+import multiprocessing
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from kombu.exceptions import OperationalError
+from rest_framework.test import APIClient
+
+from recipes.models.basic import Recipe
+from recipes.models.m2m import Favorite, IngredientAmount, ShoppingCart
+from users.models import Follow
+from .cache import ingredients_catalog, recipes_cache
+from .filters import RecipeFilter
+from .logic import remember_shopping_list_job
+from .management.seed import seed_dataset
+from .pagination import RecipeCursorPagination
+from .pdf_pool import PdfRendererPool
+from .services import (
+    attach_limited_recipes,
+    get_list_ingredients,
+    get_recipes_with_relations,
+    get_subscriptions_with_recipes,
+    search_ingredients_fuzzy,
+)
+
+
+class RecipeListQueriesTest(TestCase):
+    """
+    Число запросов списка рецептов не должно зависеть от размера
+    страницы: связи загружаются prefetch_related и аннотациями.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users=10, recipes=40, ingredients=20)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.dataset.user)
+
+    def get_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_recipes_list_queries_do_not_grow_with_page_size(self):
+        queries = self.get_queries('/api/recipes/?limit=2')
+        with self.assertNumQueries(queries):
+            self.client.get('/api/recipes/?limit=30')
+
+    def test_recipes_list_queries_do_not_grow_for_anonymous(self):
+        self.client.force_authenticate(None)
+        queries = self.get_queries('/api/recipes/?limit=2&tags=seed0')
+        with self.assertNumQueries(queries):
+            self.client.get('/api/recipes/?limit=30&tags=seed0')
+
+
+class RecipeTagsFilterTest(TestCase):
+    """
+    У рецептов по два соседних тега, поэтому выбранные теги пересекаются
+    в одних рецептах: каждый рецепт должен попасть в ответ один раз.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users=2, recipes=30, ingredients=10)
+
+    def setUp(self):
+        recipes_cache.bump()
+        self.client = APIClient()
+
+    def get_ids(self, tags_match: str) -> list[int]:
+        response = self.client.get(
+            '/api/recipes/',
+            {
+                'tags': ['seed0', 'seed1'],
+                'tags_match': tags_match,
+                'limit': 100,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(response.data['count'], len(ids))
+        return ids
+
+    def get_expected(self, *tags: set[str]) -> set[int]:
+        return {
+            recipe.id
+            for recipe in self.dataset.recipes
+            if {tag.slug for tag in recipe.tags.all()} in tags
+        }
+
+    def test_any_tag(self):
+        self.assertEqual(
+            set(self.get_ids('any')),
+            self.get_expected(
+                {'seed9', 'seed0'}, {'seed0', 'seed1'}, {'seed1', 'seed2'}
+            ),
+        )
+
+    def test_all_tags(self):
+        self.assertEqual(
+            set(self.get_ids('all')), self.get_expected({'seed0', 'seed1'})
+        )
+
+
+class IngredientSearchLimitTest(TestCase):
+    """
+    Некорректный limit поиска ингредиентов заменяется значением по
+    умолчанию, слишком большой ограничивается сверху.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(users=1, recipes=1, ingredients=30)
+
+    def setUp(self):
+        # seed_dataset создаёт ингредиенты без сигналов.
+        ingredients_catalog.bump()
+
+    def search(self, limit: str) -> int:
+        response = APIClient().get(
+            '/api/ingredients/', {'name': 'ингредиент', 'limit': limit}
+        )
+        self.assertEqual(response.status_code, 200)
+        return len(response.json())
+
+    @override_settings(INGREDIENT_SEARCH_LIMIT=5)
+    def test_invalid_limit_falls_back_to_default(self):
+        for limit in ('abc', '-1', '0', ''):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.search(limit), 5)
+
+    @override_settings(INGREDIENT_SEARCH_MAX_LIMIT=10)
+    def test_limit_is_capped(self):
+        self.assertEqual(self.search('1000'), 10)
+        self.assertEqual(self.search('3'), 3)
+
+
+class IngredientSearchUsageTest(TestCase):
+    """
+    Поиск ранжирует ингредиенты по популярности; она пересчитывается
+    после изменения ингредиентов рецептов без импорта новых.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users=1, recipes=1, ingredients=30)
+
+    def setUp(self):
+        # seed_dataset создаёт ингредиенты без сигналов.
+        ingredients_catalog.bump()
+
+    def get_top(self) -> str:
+        response = APIClient().get(
+            '/api/ingredients/', {'name': 'ингредиент', 'limit': 1}
+        )
+        return response.json()[0]['name']
+
+    def test_usage_is_refreshed_after_amounts_change(self):
+        self.assertEqual(self.get_top(), 'ингредиент 0')
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=self.dataset.user,
+                name=f'Популярный {number}',
+                text='usage',
+                image='recipes/seed.jpg',
+                cooking_time=10,
+            )
+            for number in range(2)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for recipe in recipes:
+                IngredientAmount.objects.create(
+                    recipe=recipe,
+                    ingredient=self.dataset.ingredients[29],
+                    amount=1,
+                )
+        self.assertEqual(self.get_top(), 'ингредиент 29')
+
+
+@skipUnless(
+    connection.vendor == 'postgresql', 'pg_trgm есть только в PostgreSQL'
+)
+class FuzzyIngredientSearchPlanTest(TestCase):
+    """
+    Поиск с опечатками должен использовать триграммный GIN-индекс, а не
+    считать схожесть для каждой строки справочника.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(users=1, recipes=1, ingredients=200)
+
+    def get_index_names(self, node: dict) -> set[str]:
+        names = {node['Index Name']} if 'Index Name' in node else set()
+        for child in node.get('Plans', ()):
+            names |= self.get_index_names(child)
+        return names
+
+    def test_fuzzy_search_uses_trigram_index(self):
+        sql, params = search_ingredients_fuzzy(
+            name='ингридиент', limit=10
+        ).query.sql_with_params()
+        with connection.cursor() as cursor:
+            # Справочник в тесте мал, без этого планировщик выберет Seq Scan.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0][0]['Plan']
+        self.assertIn('ingredient_name_trgm', self.get_index_names(plan))
+
+
+@skipUnless(
+    connection.vendor == 'postgresql', 'планы проверяются только в PostgreSQL'
+)
+class HotQueryPlanTest(TestCase):
+    """
+    Горячие запросы API не читают большие таблицы целиком. У других
+    пользователей есть свои избранное, корзины и подписки, поэтому
+    условие на текущего пользователя избирательно, как в проде, и
+    планировщик выбирает индекс без принудительного enable_seqscan.
+    """
+
+    HOT_RELATIONS = {
+        'recipes_recipe',
+        'recipes_recipe_tags',
+        'recipes_favorite',
+        'recipes_shoppingcart',
+        'recipes_ingredientamount',
+        'users_follow',
+    }
+    PAGE_SIZE = 6
+    RELATIONS_PER_USER = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        dataset = seed_dataset(users=300, recipes=3000, ingredients=500)
+        others = dataset.users[1:]
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(
+                    user=user,
+                    recipe=dataset.recipes[
+                        (number * 37 + shift * 11) % len(dataset.recipes)
+                    ],
+                )
+                for number, user in enumerate(others, start=1)
+                for shift in range(cls.RELATIONS_PER_USER)
+            )
+        Follow.objects.bulk_create(
+            Follow(
+                user=user,
+                following=dataset.users[
+                    (number + shift) % len(dataset.users)
+                ],
+            )
+            for number, user in enumerate(others, start=1)
+            for shift in range(1, cls.RELATIONS_PER_USER + 1)
+        )
+        cls.user = others[0]
+        cls.tags = [tag.slug for tag in dataset.tags[:2]]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def get_plan_nodes(self, node: dict):
+        yield node
+        for child in node.get('Plans', ()):
+            yield from self.get_plan_nodes(child)
+
+    def assert_plans(
+        self,
+        scenario,
+        indexes: set[str] = frozenset(),
+        tables: set[str] = frozenset(),
+    ):
+        """
+        Ни один SELECT сценария не сканирует горячие таблицы целиком,
+        в планах есть каждый из индексов indexes, а таблицы tables
+        читаются по какому-либо своему индексу.
+        """
+        with CaptureQueriesContext(connection) as context:
+            scenario()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT indexname, tablename FROM pg_indexes '
+                'WHERE schemaname = current_schema()'
+            )
+            index_tables = dict(cursor.fetchall())
+        used, scans = set(), set()
+        for query in context.captured_queries:
+            if not query['sql'].lstrip().upper().startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {query["sql"]}')
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            for node in self.get_plan_nodes(plan[0]['Plan']):
+                if 'Index Name' in node:
+                    used.add(node['Index Name'])
+                if node['Node Type'] == 'Seq Scan':
+                    scans.add(node['Relation Name'])
+        self.assertFalse(scans & self.HOT_RELATIONS)
+        self.assertLessEqual(indexes, used)
+        self.assertLessEqual(tables, {index_tables[name] for name in used})
+
+    def get_recipes(self, **data):
+        request = SimpleNamespace(user=self.user, query_params={})
+
+        def run():
+            queryset = RecipeFilter(
+                data=data,
+                queryset=get_recipes_with_relations(user=self.user),
+                request=request,
+            ).qs
+            list(queryset[: self.PAGE_SIZE])
+
+        return run
+
+    def test_recipes(self):
+        self.assert_plans(self.get_recipes(), {'recipe_pub_date_id'})
+
+    def test_recipes_cursor(self):
+        recipe = Recipe.objects.order_by('-pub_date', '-id')[100]
+        cursor = SimpleNamespace(
+            pub_date=recipe.pub_date, pk=recipe.pk, reverse=False
+        )
+
+        def run():
+            queryset = get_recipes_with_relations(user=self.user).filter(
+                RecipeCursorPagination._get_condition(cursor)
+            )
+            list(queryset.order_by('-pub_date', '-id')[: self.PAGE_SIZE])
+
+        self.assert_plans(run, {'recipe_pub_date_id'})
+
+    def test_recipes_by_tags(self):
+        self.assert_plans(
+            self.get_recipes(tags=self.tags), tables={'recipes_recipe_tags'}
+        )
+
+    def test_recipes_by_all_tags(self):
+        self.assert_plans(
+            self.get_recipes(tags=self.tags, tags_match='all'),
+            tables={'recipes_recipe_tags'},
+        )
+
+    def test_recipes_by_author(self):
+        self.assert_plans(
+            self.get_recipes(author=self.user.id), {'recipe_author_pub_date'}
+        )
+
+    def test_recipes_favorited(self):
+        self.assert_plans(self.get_recipes(is_favorited=True))
+
+    def test_recipes_in_cart(self):
+        self.assert_plans(self.get_recipes(is_in_shopping_cart=True))
+
+    def test_shopping_list(self):
+        self.assert_plans(
+            lambda: list(get_list_ingredients(user_id=self.user.id))
+        )
+
+    def test_subscriptions(self):
+        self.assert_plans(
+            lambda: attach_limited_recipes(
+                authors=list(
+                    get_subscriptions_with_recipes(user=self.user)[
+                        : self.PAGE_SIZE
+                    ]
+                ),
+                recipes_limit=3,
+            ),
+            tables={'recipes_recipe', 'users_follow'},
+        )
+
+
+class ShoppingListJobTest(TestCase):
+    """
+    Результат фоновой генерации списка покупок доступен только
+    пользователю, поставившему задачу.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users=2, recipes=4, ingredients=10)
+
+    def get_client(self, user) -> APIClient:
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_unknown_job_is_not_found(self):
+        response = self.get_client(self.dataset.user).get(
+            '/api/recipes/download_shopping_cart/unknown-job/'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_foreign_job_is_not_found(self):
+        remember_shopping_list_job(
+            job_id='foreign-job', user_id=self.dataset.users[1].id
+        )
+        response = self.get_client(self.dataset.user).get(
+            '/api/recipes/download_shopping_cart/foreign-job/'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch('api.views.recipe.get_cached_pdf', return_value=b'%PDF')
+    @mock.patch(
+        'api.views.recipe.render_shopping_list.delay',
+        side_effect=OperationalError,
+    )
+    def test_unreachable_broker_renders_inline(self, delay, get_cached_pdf):
+        response = self.get_client(self.dataset.user).get(
+            '/api/recipes/download_shopping_cart/?async=1'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'%PDF')
+
+
+class PdfRendererPoolTest(SimpleTestCase):
+    """
+    Зависший пул не оставляет запрос без PDF.
+    """
+
+    @mock.patch('api.pdf_pool._render', return_value=b'%PDF')
+    def test_timeout_renders_inline(self, render):
+        renderer = PdfRendererPool(size=1, max_jobs=1, timeout=1)
+        job = mock.Mock()
+        job.get.side_effect = multiprocessing.TimeoutError
+        with mock.patch.object(renderer, '_get_pool') as get_pool:
+            get_pool.return_value.apply_async.return_value = job
+            content = renderer.render(ingredients=[('соль', 1, 'г')])
+        self.assertEqual(content, b'%PDF')
+        self.assertEqual(renderer.summary()['timeouts'], 1)
@@ -1,10 +1,19 @@
+from django.conf import settings
+from rest_framework.pagination import _positive_int
 from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from api.cache import catalog_cached, ingredients_catalog
 from api.filters import IngredientSearchFilter
+from api.search import ingredient_index
 from api.serializers.ingredients import IngredientSerializer
+from api.services import search_ingredients_fuzzy
 from recipes.models.basic import Ingredient
 
+FUZZY_SEARCH_MODE = 'fuzzy'
+
 
 class IngredientsViewSet(ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -14,3 +23,30 @@ class IngredientsViewSet(ReadOnlyModelViewSet):
     filter_backends = [IngredientSearchFilter]
     search_fields = ('^name',)
     swagger_tags = ('Ingredients',)
+
+    @catalog_cached(ingredients_catalog)
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        name = request.query_params.get(IngredientSearchFilter.search_param)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        limit = self._get_limit(request)
+        if request.query_params.get('mode') == FUZZY_SEARCH_MODE:
+            queryset = search_ingredients_fuzzy(name=name, limit=limit)
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+        return Response(ingredient_index.search(prefix=name, limit=limit))
+
+    @staticmethod
+    def _get_limit(request: Request) -> int:
+        try:
+            return _positive_int(
+                request.query_params['limit'],
+                strict=True,
+                cutoff=settings.INGREDIENT_SEARCH_MAX_LIMIT,
+            )
+        except (KeyError, ValueError):
+            return settings.INGREDIENT_SEARCH_LIMIT
+
+    @catalog_cached(ingredients_catalog)
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return super().retrieve(request, *args, **kwargs)
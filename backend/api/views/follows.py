@@ -9,6 +9,10 @@ from rest_framework.views import APIView
 
 from users.models import Follow
 from ..serializers.follows import FollowSerializer
+from ..services import (
+    attach_limited_recipes,
+    get_subscriptions_with_recipes,
+)
 
 User = get_user_model()
 
@@ -63,4 +67,14 @@ class FollowListAPIView(ListAPIView):
     swagger_tags = ('Follows',)
 
     def get_queryset(self) -> list[User]:
-        return User.objects.filter(followers__user=self.request.user)
+        return get_subscriptions_with_recipes(user=self.request.user)
+
+    def paginate_queryset(self, queryset) -> list[User] | None:
+        page = super().paginate_queryset(queryset)
+        if page is None:
+            return None
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        return attach_limited_recipes(
+            authors=page,
+            recipes_limit=int(recipes_limit) if recipes_limit else None,
+        )
@@ -1,23 +1,35 @@
+import logging
+import os
 from typing import Type
 
-from django.db.models import Model
-from django.http import HttpResponse
+from celery.result import AsyncResult
+from django.conf import settings
+from django.db.models import Model, QuerySet
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema, no_body
+from kombu.exceptions import OperationalError
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import BasePagination
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
+from config.celery_config import app
 from recipes.models.basic import Recipe
 from recipes.models.m2m import Favorite, ShoppingCart
+from ..cache import catalog_cached, recipes_cache
 from ..filters import RecipeFilter
+from ..pagination import RecipeCursorPagination, RecipePageNumberPagination
+from ..parsers import RecipeMultiPartParser
 from ..permissions import IsAuthorOrReadOnly
 from ..serializers.favorite import FavoriteSerializer
 from ..serializers.recipes import (
@@ -26,8 +38,21 @@ from ..serializers.recipes import (
     ShortRecipeSerializer,
 )
 from ..serializers.shoping_cart import ShoppingCartSerializer
-from ..services import get_list_ingredients
-from ..logic import get_pdf
+from ..services import get_list_ingredients, get_recipes_with_relations
+from ..logic import (
+    SHOPPING_LIST_CONTENT_TYPES,
+    get_cached_pdf,
+    get_shopping_list_job_owner,
+    remember_shopping_list_job,
+    stream_shopping_list,
+)
+from ..pdf_pool import pdf_renderer
+from ..renderers import CSVRenderer, PlainTextRenderer
+from ..tasks import render_shopping_list
+
+ASYNC_QUERY_VALUES = ('1', 'true')
+
+logger = logging.getLogger(__name__)
 
 
 @method_decorator(
@@ -85,6 +110,34 @@ from ..logic import get_pdf
                 schema=openapi.Schema(type=openapi.TYPE_FILE),
             )
         },
+        manual_parameters=[
+            openapi.Parameter(
+                'async',
+                openapi.IN_QUERY,
+                description='Поставить генерацию PDF в очередь',
+                type=openapi.TYPE_BOOLEAN,
+            ),
+            openapi.Parameter(
+                'format',
+                openapi.IN_QUERY,
+                description='Выгрузка без PDF: txt, csv или json',
+                type=openapi.TYPE_STRING,
+                enum=list(SHOPPING_LIST_CONTENT_TYPES),
+            ),
+        ],
+        tags=['Favorites', 'Recipes'],
+    ),
+)
+@method_decorator(
+    name='download_shopping_cart_result',
+    decorator=swagger_auto_schema(
+        operation_description='Статус и результат генерации списка покупок',
+        responses={
+            '200': openapi.Response(
+                'File Attachment',
+                schema=openapi.Schema(type=openapi.TYPE_FILE),
+            )
+        },
         tags=['Favorites', 'Recipes'],
     ),
 )
@@ -93,8 +146,37 @@ class RecipeViewSet(ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = RecipePageNumberPagination
+    parser_classes = (JSONParser, RecipeMultiPartParser)
     swagger_tags = ('Recipes',)
 
+    def get_queryset(self) -> QuerySet:
+        if self.action in ('list', 'retrieve'):
+            return get_recipes_with_relations(user=self.request.user)
+        return super().get_queryset()
+
+    @property
+    def paginator(self) -> BasePagination | None:
+        """
+        ?pagination=cursor включает keyset-пагинацию ленты без COUNT(*)
+        и OFFSET, по умолчанию остаётся постраничная.
+        """
+        if not hasattr(self, '_paginator'):
+            cursor = self.request.query_params.get('pagination') == 'cursor'
+            if self.action == 'list' and cursor:
+                self._paginator = RecipeCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    @catalog_cached(recipes_cache)
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        return super().list(request, *args, **kwargs)
+
+    @catalog_cached(recipes_cache)
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return super().retrieve(request, *args, **kwargs)
+
     def get_serializer_class(
         self,
     ) -> Type[RecipeListSerializer | RecipeSerializer]:
@@ -131,14 +213,104 @@ class RecipeViewSet(ModelViewSet):
         )
 
     @action(
-        detail=False, methods=['GET'], permission_classes=[IsAuthenticated]
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            PlainTextRenderer,
+            CSVRenderer,
+        ],
     )
     def download_shopping_cart(self, request: Request) -> HttpResponse:
-        ingredients = get_list_ingredients(user=request.user)
-        content = get_pdf(context={'ingredients': ingredients})
+        export_format = request.query_params.get('format')
+        if export_format in SHOPPING_LIST_CONTENT_TYPES:
+            ingredients = get_list_ingredients(
+                user_id=request.user.id
+            ).iterator(chunk_size=settings.SHOPPING_LIST_CHUNK_SIZE)
+            response = StreamingHttpResponse(
+                stream_shopping_list(ingredients, export_format),
+                content_type=SHOPPING_LIST_CONTENT_TYPES[export_format],
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename=shopping_list.{export_format}'
+            )
+            return response
+        if request.query_params.get('async') in ASYNC_QUERY_VALUES:
+            try:
+                task = render_shopping_list.delay(user_id=request.user.id)
+            except OperationalError:
+                # Без брокера список рендерится синхронно, как без async.
+                logger.exception(
+                    'Не удалось поставить список покупок пользователя %s '
+                    'в очередь',
+                    request.user.id,
+                )
+            else:
+                remember_shopping_list_job(
+                    job_id=task.id, user_id=request.user.id
+                )
+                return Response(
+                    {'job_id': task.id, 'status': task.state},
+                    status=status.HTTP_202_ACCEPTED,
+                )
+        ingredients = list(get_list_ingredients(user_id=request.user.id))
+        content = get_cached_pdf(ingredients=ingredients)
         response = HttpResponse(
             content=content, content_type='application/pdf;'
         )
+        return self.set_pdf_headers(response)
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        url_path=r'download_shopping_cart/(?P<job_id>[\w-]+)',
+    )
+    def download_shopping_cart_result(
+        self, request: Request, job_id: str
+    ) -> HttpResponse:
+        if get_shopping_list_job_owner(job_id=job_id) != request.user.id:
+            return Response(
+                {'error': 'Задача не найдена'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        result = AsyncResult(job_id, app=app)
+        if not result.ready():
+            return Response(
+                {'job_id': job_id, 'status': result.state},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        if not result.successful():
+            return Response(
+                {'job_id': job_id, 'status': result.state},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        data = result.result
+        path = os.path.join(settings.SHOPPING_LIST_CACHE_DIR, data['file'])
+        if data['user'] != request.user.id or not os.path.exists(path):
+            return Response(
+                {'error': 'Файл не найден, запросите список заново'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = FileResponse(
+            open(path, 'rb'), content_type='application/pdf;'
+        )
+        return self.set_pdf_headers(response)
+
+    @action(
+        detail=False, methods=['GET'], permission_classes=[IsAdminUser]
+    )
+    def pdf_render_stats(self, request: Request) -> Response:
+        """
+        p50/p99 длительности рендера PDF в одном веб-воркере — том, что
+        обработал запрос, — и только в его режиме (pool или inline).
+        Для сравнения режимов служит команда benchmark_pdf_render.
+        """
+        return Response(pdf_renderer.summary())
+
+    @staticmethod
+    def set_pdf_headers(response: HttpResponse) -> HttpResponse:
         response['Content-Disposition'] = 'inline; filename=shopping_list.pdf'
         response['Content-Transfer-Encoding'] = 'binary'
         return response
@@ -1,7 +1,10 @@
 from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from recipes.models.basic import Tag
+from ..cache import catalog_cached, tags_catalog
 from ..serializers.tags import TagSerializer
 
 
@@ -11,3 +14,11 @@ class TagsViewSet(ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
     swagger_tags = ('Tags',)
+
+    @catalog_cached(tags_catalog)
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        return super().list(request, *args, **kwargs)
+
+    @catalog_cached(tags_catalog)
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return super().retrieve(request, *args, **kwargs)
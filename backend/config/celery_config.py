@@ -6,7 +6,7 @@ from celery.schedules import crontab
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-app = Celery(main='FoodGramProject', include='recipes.tasks')
+app = Celery(main='FoodGramProject', include=['recipes.tasks', 'api.tasks'])
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.conf.beat_schedule = {
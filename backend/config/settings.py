@@ -20,6 +20,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 LOCAL_APPS = [
@@ -72,6 +73,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_REDIS_URL', default='redis://redis:6379/1'),
+    }
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -116,6 +124,17 @@ STATICFILES_DIRS = (STATIC_DIR,)
 
 MEDIA_URL = '/backend_media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+SHOPPING_LIST_CACHE_DIR = os.path.join(MEDIA_ROOT, 'shopping_lists')
+SHOPPING_LIST_CACHE_MAX_SIZE = int(
+    os.getenv('SHOPPING_LIST_CACHE_MAX_SIZE', default=100 * 1024 * 1024)
+)
+SHOPPING_LIST_CHUNK_SIZE = 2000
+# Совпадает со сроком хранения результатов Celery (result_expires).
+SHOPPING_LIST_JOB_TIMEOUT = 24 * 60 * 60
+PDF_RENDER_POOL_SIZE = int(os.getenv('PDF_RENDER_POOL_SIZE', default=1))
+PDF_RENDER_MAX_JOBS = int(os.getenv('PDF_RENDER_MAX_JOBS', default=200))
+PDF_RENDER_TIMEOUT = 30
+PDF_RENDER_STATS_SIZE = 1000
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -198,6 +217,16 @@ LOGGING = {
             'handlers': ['file'],
             'propagate': True,
         },
+        'api': {
+            'level': LOG_LEVEL,
+            'handlers': ['file'],
+            'propagate': True,
+        },
+        'recipes': {
+            'level': LOG_LEVEL,
+            'handlers': ['file'],
+            'propagate': True,
+        },
     },
 }
 
@@ -207,6 +236,14 @@ CORS_URLS_REGEX = r'^/api/.*$'
 SPOONACULAR_API_URL = 'https://api.spoonacular.com'
 SPOONACULAR_API_KEY = os.getenv('SPOONACULAR_API_KEY', default=None)
 SPOONACULAR_HEADERS = {'Content-Type': 'application/json'}
+HTTP_TIMEOUT = (5, 30)
+HTTP_POOL_SIZE = 10
+IMAGE_DOWNLOAD_WORKERS = int(os.getenv('IMAGE_DOWNLOAD_WORKERS', default=8))
+TRANSLATION_WORKERS = int(os.getenv('TRANSLATION_WORKERS', default=4))
+TRANSLATION_BATCH_SIZE = 4500
+TRANSLATION_MEMO_MAX_SIZE = int(
+    os.getenv('TRANSLATION_MEMO_MAX_SIZE', default=50000)
+)
 
 CELERY_BROKER_URL = os.getenv(
     'CELERY_BROKER_URL', default='redis://redis:6379'
@@ -220,3 +257,25 @@ CELERY_RESULT_SERIALIZER = CELERY_TASK_SERIALIZER
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_PER_HOUR = os.getenv('CELERY_BEAT_PER_HOUR', default='3')
 CELERY_RETRY_COUNT = 4
+CELERY_RECIPES_FANOUT = int(os.getenv('CELERY_RECIPES_FANOUT', default=0))
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=20))
+INGREDIENT_SEARCH_MAX_LIMIT = int(
+    os.getenv('INGREDIENT_SEARCH_MAX_LIMIT', default=100)
+)
+CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', default=512))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv('COUNT_ESTIMATE_THRESHOLD', default=100000)
+)
+
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (150, 150),
+    'card': (300, 300),
+    'full': (1280, 1280),
+}
+RECIPE_IMAGE_FORMATS = {'jpeg': 85, 'webp': 80}
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_DIMENSIONS = (6000, 6000)
@@ -5,6 +5,7 @@ from django.http import HttpRequest
 
 from .models.basic import Ingredient, Recipe, Tag
 from .models.m2m import IngredientAmount, Favorite, ShoppingCart
+from .models.translations import Translation
 
 EMPTY_VALUE = '-пусто-'
 
@@ -78,3 +79,11 @@ class FavoriteAdmin(admin.ModelAdmin):
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     empty_value_display = EMPTY_VALUE
+
+
+@admin.register(Translation)
+class TranslationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'text', 'translation', 'hits', 'last_used')
+    list_filter = ('source', 'target')
+    search_fields = ('text', 'translation')
+    empty_value_display = EMPTY_VALUE
@@ -0,0 +1,97 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from kombu.exceptions import OperationalError
+from PIL import Image, ImageOps
+
+from .models.basic import Recipe
+
+VARIANTS_DIR = 'recipes/variants'
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_image_variants(recipe: Recipe) -> None:
+    """
+    Ставит построение вариантов изображения в очередь после фиксации
+    транзакции, чтобы задача увидела сохранённый файл. Если брокер
+    недоступен, рецепт остаётся без вариантов и отдаётся с оригиналом.
+    """
+    from .tasks import build_image_variants
+
+    recipe_id = recipe.pk
+
+    def schedule() -> None:
+        try:
+            build_image_variants.delay(recipe_id)
+        except OperationalError:
+            logger.exception(
+                'Не удалось поставить построение вариантов изображения '
+                'рецепта %s в очередь',
+                recipe_id,
+            )
+
+    transaction.on_commit(schedule)
+
+
+def build_variants(name: str) -> dict[str, dict[str, str]]:
+    """
+    Создаёт уменьшенные копии изображения для каждого размера из
+    RECIPE_IMAGE_VARIANTS и каждого формата из RECIPE_IMAGE_FORMATS.
+    Возвращает пути к файлам в хранилище.
+    """
+    with default_storage.open(name) as file:
+        source = ImageOps.exif_transpose(Image.open(file))
+        source = source.convert('RGB')
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {}
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        image = source.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        variants[variant] = {
+            image_format: _save_variant(
+                image=image,
+                path=(
+                    f'{VARIANTS_DIR}/{stem}_{variant}'
+                    f'.{EXTENSIONS[image_format]}'
+                ),
+                image_format=image_format,
+                quality=quality,
+            )
+            for image_format, quality in settings.RECIPE_IMAGE_FORMATS.items()
+        }
+    return variants
+
+
+def release_variants(name: str, variants: dict) -> None:
+    """
+    Удаляет варианты изображения, если исходный файл больше не
+    используется ни одним рецептом. При хранении по хешу содержимого
+    рецепты с одинаковым изображением делят одни и те же варианты.
+    """
+    if Recipe.objects.filter(image=name).exists():
+        return
+    for path in _get_paths(variants):
+        default_storage.delete(path)
+
+
+def _save_variant(
+    image: Image.Image, path: str, image_format: str, quality: int
+) -> str:
+    if default_storage.exists(path):
+        return path
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return default_storage.save(path, ContentFile(buffer.getvalue()))
+
+
+def _get_paths(variants: dict) -> list[str]:
+    return [
+        path for formats in variants.values() for path in formats.values()
+    ]
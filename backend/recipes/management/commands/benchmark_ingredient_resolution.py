@@ -0,0 +1,148 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models.basic import Ingredient, Recipe
+from recipes.models.m2m import IngredientAmount
+from recipes.services import RecipeSaver
+
+User = get_user_model()
+
+UNITS = ('г', 'кг', 'мл', 'л', 'шт', 'ст. л.', 'ч. л.')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает разрешение ингредиентов RecipeSaver одним запросом на '
+        'пачку с прежней построчной проверкой на каждый рецепт: время, '
+        'число запросов и число созданных строк. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=15)
+        parser.add_argument('--ingredients', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author = User.objects.create(
+                email='bench@foodgram.local',
+                username='bench',
+                first_name='bench',
+                last_name='bench',
+            )
+            data = self._build_data(options)
+            results = {}
+            for name, run in (
+                ('per-recipe', self._per_recipe),
+                ('batch', self._batch),
+            ):
+                results[name] = self._measure(name, author, data, run)
+            transaction.set_rollback(True)
+        if len(set(results.values())) > 1:
+            raise CommandError(f'Результаты различаются: {results}')
+
+    def _measure(self, name: str, author: User, data: list[dict], run):
+        sid = transaction.savepoint()
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'Бенч {number}',
+                text='bench',
+                image='recipes/bench.jpg',
+                cooking_time=10,
+            )
+            for number in range(len(data))
+        )
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            run(recipes, data)
+            elapsed = time.perf_counter() - start
+        result = (
+            Ingredient.objects.count(),
+            IngredientAmount.objects.count(),
+        )
+        self.stdout.write(
+            f'{name:<12}{elapsed * 1000:>10.1f} ms'
+            f'{len(context.captured_queries):>8} queries  '
+            f'ingredients={result[0]} amounts={result[1]}'
+        )
+        transaction.savepoint_rollback(sid)
+        return result
+
+    @staticmethod
+    def _build_data(options) -> list[dict]:
+        """
+        Рецепты в формате JsonParser.result: ингредиенты выбираются из
+        общего словаря, поэтому большая часть пар повторяется.
+        """
+        vocabulary = options['ingredients']
+        return [
+            {
+                'ingredients': [
+                    {
+                        'name': (
+                            f'ингредиент {(number * 7 + shift) % vocabulary}'
+                        ),
+                        'measurement_unit': UNITS[shift % len(UNITS)],
+                        'amount': shift + 1,
+                    }
+                    for shift in range(options['ingredients_per_recipe'])
+                ]
+            }
+            for number in range(options['recipes'])
+        ]
+
+    @staticmethod
+    def _batch(recipes: list[Recipe], data: list[dict]) -> None:
+        saver = RecipeSaver(user=None)
+        saver._ingredients = saver._resolve_ingredients(data=data)
+        for recipe, recipe_data in zip(recipes, data):
+            saver._bulk_create_ingredient_amount(
+                recipe=recipe, data=recipe_data['ingredients']
+            )
+
+    @staticmethod
+    def _per_recipe(recipes: list[Recipe], data: list[dict]) -> None:
+        """
+        Прежний RecipeSaver._bulk_create: для каждого рецепта два запроса
+        по name__in × measurement_unit__in и поиск перебором.
+        """
+        for recipe, recipe_data in zip(recipes, data):
+            elements = recipe_data['ingredients']
+            existing = Ingredient.objects.filter(
+                name__in={element['name'] for element in elements},
+                measurement_unit__in={
+                    element['measurement_unit'] for element in elements
+                },
+            )
+            keys = {
+                RecipeSaver._get_ingredient_key(element)
+                for element in elements
+                if RecipeSaver._get_ingredient_key(element)
+                not in {
+                    (ingredient.name, ingredient.measurement_unit)
+                    for ingredient in existing
+                }
+            }
+            Ingredient.objects.bulk_create(
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in keys
+            )
+            existing = list(existing.all())
+            IngredientAmount.objects.bulk_create(
+                IngredientAmount(
+                    recipe=recipe,
+                    ingredient=[
+                        ingredient
+                        for ingredient in existing
+                        if (ingredient.name, ingredient.measurement_unit)
+                        == RecipeSaver._get_ingredient_key(element)
+                    ][0],
+                    amount=element['amount'],
+                )
+                for element in elements
+            )
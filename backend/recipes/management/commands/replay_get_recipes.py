@@ -0,0 +1,228 @@
+import json
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+
+from recipes.replay import (
+    IMAGE_BASE_URL,
+    OfflineAdapter,
+    ReplayAdapter,
+    ReplayTranslator,
+    build_recipes,
+)
+from recipes.services import (
+    JsonParser,
+    RecipeSaver,
+    RecipesCrawler,
+    http_session,
+)
+from recipes.tasks import get_recipes
+
+User = get_user_model()
+
+
+class StageTimer:
+    """
+    Время и число SQL-запросов по этапам конвейера.
+    """
+
+    def __init__(self) -> None:
+        self.stages = {}
+
+    def wrap(self, stage: str, method):
+        timer = self
+
+        def wrapper(*args, **kwargs):
+            with timer.measure(stage):
+                return method(*args, **kwargs)
+
+        return wrapper
+
+    def wrap_iterator(self, stage: str, method):
+        """
+        Для генератора учитывается только время получения очередного
+        элемента: обработка элемента потребителем в этап не входит.
+        """
+        timer = self
+
+        def wrapper(*args, **kwargs):
+            iterator = method(*args, **kwargs)
+            while True:
+                with timer.measure(stage):
+                    item = next(iterator, StopIteration)
+                if item is StopIteration:
+                    return
+                yield item
+
+        return wrapper
+
+    @contextmanager
+    def measure(self, stage: str):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count):
+                yield
+        finally:
+            seconds, total = self.stages.get(stage, (0, 0))
+            self.stages[stage] = (
+                seconds + time.perf_counter() - start,
+                total + queries,
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает recipes.tasks.get_recipes без сети: Spoonacular, '
+        'переводчик и изображения подменяются локальными ответами. '
+        'Выводит время и число запросов по этапам; pipeline включает '
+        'parse, save и ожидание изображений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=8)
+        parser.add_argument('--ingredients', type=int, default=10)
+        parser.add_argument(
+            '--fixture',
+            help='JSON с записанным ответом recipes/random',
+        )
+        parser.add_argument(
+            '--api-latency', type=float, default=0.3, help='секунды'
+        )
+        parser.add_argument(
+            '--image-latency', type=float, default=0.2, help='секунды'
+        )
+        parser.add_argument(
+            '--translate-latency', type=float, default=0.15, help='секунды'
+        )
+        parser.add_argument('--error-rate', type=float, default=0)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Сохранить созданные рецепты вместо отката',
+        )
+
+    def handle(self, *args, **options):
+        recipes = self._load_recipes(options)
+        adapter = ReplayAdapter(
+            recipes=recipes,
+            latency=options['api_latency'],
+            image_latency=options['image_latency'],
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        translator = ReplayTranslator(latency=options['translate_latency'])
+        timer = StageTimer()
+        start = time.perf_counter()
+        with self._replay(adapter, translator, timer, options):
+            result = get_recipes.apply()
+        total = time.perf_counter() - start
+
+        self.stdout.write(f'{"stage":<10}{"seconds":>10}{"queries":>10}')
+        for stage, (seconds, queries) in timer.stages.items():
+            self.stdout.write(f'{stage:<10}{seconds:>10.3f}{queries:>10}')
+        self.stdout.write(f'{"total":<10}{total:>10.3f}')
+        self.stdout.write(f'translator calls: {translator.calls}')
+        self.stdout.write(f'task state: {result.state}')
+        self.stdout.write(json.dumps(result.result, default=str))
+
+    @contextmanager
+    def _replay(self, adapter, translator, timer, options):
+        with ExitStack() as stack:
+            if not options['keep']:
+                media_root = stack.enter_context(
+                    tempfile.TemporaryDirectory()
+                )
+                stack.enter_context(override_settings(MEDIA_ROOT=media_root))
+            stack.enter_context(self._mount(adapter))
+            patches = (
+                (JsonParser, '_translate_string', staticmethod(translator)),
+                (
+                    RecipesCrawler,
+                    '_get_number_of_recipes',
+                    staticmethod(lambda: options['recipes']),
+                ),
+                (
+                    RecipesCrawler,
+                    'execute',
+                    timer.wrap('crawl', RecipesCrawler.execute),
+                ),
+                (JsonParser, 'parse', timer.wrap('parse', JsonParser.parse)),
+                (
+                    JsonParser,
+                    'iter_parse',
+                    timer.wrap_iterator('parse', JsonParser.iter_parse),
+                ),
+                (
+                    RecipeSaver,
+                    '_save_one',
+                    timer.wrap('save', RecipeSaver._save_one),
+                ),
+                (
+                    RecipeSaver,
+                    'save_stream',
+                    timer.wrap('pipeline', RecipeSaver.save_stream),
+                ),
+            )
+            for target, attribute, value in patches:
+                stack.enter_context(
+                    mock.patch.object(target, attribute, value)
+                )
+            stack.enter_context(transaction.atomic())
+            if not User.objects.filter(is_superuser=True).exists():
+                User.objects.create_superuser(
+                    email='replay@foodgram.local',
+                    username='replay',
+                    first_name='replay',
+                    last_name='replay',
+                    password=None,
+                )
+            yield
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    @staticmethod
+    @contextmanager
+    def _mount(adapter):
+        """
+        Запросы к остальным хостам завершаются ошибкой, а не уходят в сеть.
+        """
+        adapters = OrderedDict(http_session.adapters)
+        http_session.mount('http://', OfflineAdapter())
+        http_session.mount('https://', OfflineAdapter())
+        http_session.mount(settings.SPOONACULAR_API_URL, adapter)
+        http_session.mount(IMAGE_BASE_URL, adapter)
+        try:
+            yield
+        finally:
+            http_session.adapters = adapters
+
+    @staticmethod
+    def _load_recipes(options) -> list[dict]:
+        if options['fixture']:
+            with open(options['fixture'], 'r', encoding='utf-8') as file:
+                recipes = json.load(file)['recipes']
+            # Изображения записанных рецептов отдаёт ReplayAdapter.
+            for recipe in recipes:
+                if recipe.get('image'):
+                    name = recipe['image'].rsplit('/', 1)[-1]
+                    recipe['image'] = f'{IMAGE_BASE_URL}recipes/{name}'
+            return recipes
+        return build_recipes(
+            number=options['recipes'], ingredients=options['ingredients']
+        )
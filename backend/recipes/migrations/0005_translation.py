@@ -0,0 +1,83 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_name_trgm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Translation',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'source',
+                    models.CharField(
+                        max_length=10, verbose_name='Исходный язык'
+                    ),
+                ),
+                (
+                    'target',
+                    models.CharField(
+                        max_length=10, verbose_name='Язык перевода'
+                    ),
+                ),
+                (
+                    'key',
+                    models.CharField(
+                        help_text='SHA-256 нормализованного текста',
+                        max_length=64,
+                        verbose_name='Ключ',
+                    ),
+                ),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('translation', models.TextField(verbose_name='Перевод')),
+                (
+                    'latency',
+                    models.FloatField(
+                        default=0,
+                        help_text='Время запроса к переводчику в секундах',
+                        verbose_name='Время перевода',
+                    ),
+                ),
+                (
+                    'hits',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Попадания'
+                    ),
+                ),
+                (
+                    'last_used',
+                    models.DateTimeField(
+                        verbose_name='Последнее использование'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Перевод',
+                'verbose_name_plural': 'Переводы',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='translation',
+            index=models.Index(
+                fields=['last_used'], name='translation_last_used'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='translation',
+            constraint=models.UniqueConstraint(
+                fields=('source', 'target', 'key'), name='unique_translation'
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(
+                storage=recipes.storage.RecipeImageStorage,
+                upload_to='recipes/',
+                verbose_name='Изображение',
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_pub_date_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['author', '-pub_date'], name='recipe_author_pub_date'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='ingredientamount',
+            index=models.Index(
+                fields=['recipe', 'ingredient'],
+                include=['amount'],
+                name='amount_recipe_ingredient',
+            ),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MinValueValidator
 from django.db import models
 
 from .abstract import AbstractNamedModel
+from ..storage import RecipeImageStorage
 
 DEFAULT_COLOR_CODE = '#FF0000'
 
@@ -26,6 +28,13 @@ class Ingredient(AbstractNamedModel):
                 name='unique_ingredient',
             ),
         ]
+        indexes = [
+            GinIndex(
+                fields=['name'],
+                name='ingredient_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
         app_label = 'recipes'
 
     def __str__(self):
@@ -74,6 +83,14 @@ class Recipe(AbstractNamedModel):
     image = models.ImageField(
         verbose_name='Изображение',
         upload_to='recipes/',
+        storage=RecipeImageStorage,
+    )
+    image_variants = models.JSONField(
+        verbose_name='Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Уменьшенные копии изображения в форматах JPEG и WebP',
     )
     text = models.TextField(verbose_name='Описание рецепта')
     ingredients = models.ManyToManyField(
@@ -110,4 +127,14 @@ class Recipe(AbstractNamedModel):
                 name='unique_recipe_name',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id',
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date',
+            ),
+        ]
         app_label = 'recipes'
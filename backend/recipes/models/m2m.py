@@ -68,6 +68,13 @@ class IngredientAmount(models.Model):
                 name='unique_ingredient_amount',
             ),
         )
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient'],
+                name='amount_recipe_ingredient',
+                include=['amount'],
+            ),
+        ]
         default_related_name = 'amounts'
         app_label = 'recipes'
 
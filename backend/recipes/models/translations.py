@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class Translation(models.Model):
+    source = models.CharField(verbose_name='Исходный язык', max_length=10)
+    target = models.CharField(verbose_name='Язык перевода', max_length=10)
+    key = models.CharField(
+        verbose_name='Ключ',
+        max_length=64,
+        help_text='SHA-256 нормализованного текста',
+    )
+    text = models.TextField(verbose_name='Текст')
+    translation = models.TextField(verbose_name='Перевод')
+    latency = models.FloatField(
+        verbose_name='Время перевода',
+        default=0,
+        help_text='Время запроса к переводчику в секундах',
+    )
+    hits = models.PositiveIntegerField(verbose_name='Попадания', default=0)
+    last_used = models.DateTimeField(verbose_name='Последнее использование')
+
+    class Meta:
+        verbose_name = 'Перевод'
+        verbose_name_plural = 'Переводы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('source', 'target', 'key'),
+                name='unique_translation',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['last_used'], name='translation_last_used'),
+        ]
+        app_label = 'recipes'
+
+    def __str__(self) -> str:
+        return f'{self.text[:50]} - {self.translation[:50]}'
@@ -0,0 +1,168 @@
+import io
+import itertools
+import json
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as OfflineError
+
+IMAGE_BASE_URL = 'https://images.replay.local/'
+INGREDIENTS = (
+    ('flour', 'cups'),
+    ('sugar', 'tablespoons'),
+    ('salt', 'teaspoon'),
+    ('butter', 'ounces'),
+    ('egg', ''),
+    ('milk', 'cup'),
+    ('garlic', 'cloves'),
+    ('onion', 'large'),
+    ('olive oil', 'tablespoons'),
+    ('tomato', 'medium'),
+    ('chicken breast', 'pounds'),
+    ('black pepper', 'pinch'),
+    ('parsley', 'sprigs'),
+    ('lemon juice', 'tablespoon'),
+    ('rice', 'cups'),
+)
+
+
+def build_recipes(number: int, ingredients: int) -> list[dict]:
+    """
+    Синтетические рецепты в формате ответа Spoonacular recipes/random.
+    """
+    return [
+        {
+            'title': f'Replay recipe {index}',
+            'summary': f'<b>Replay</b> recipe number {index}.',
+            'image': f'{IMAGE_BASE_URL}recipes/{index}.jpg',
+            'readyInMinutes': 10 + index % 50,
+            'extendedIngredients': [
+                {
+                    'name': name,
+                    'measures': {
+                        'us': {'amount': 1 + position / 3, 'unitLong': unit}
+                    },
+                }
+                for position, (name, unit) in enumerate(
+                    itertools.islice(
+                        itertools.cycle(INGREDIENTS),
+                        index,
+                        index + ingredients,
+                    )
+                )
+            ],
+        }
+        for index in range(number)
+    ]
+
+
+def build_image(size: tuple[int, int] = (636, 393)) -> bytes:
+    image = Image.new('RGB', size, color=(200, 120, 40))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Транспорт requests, подменяющий Spoonacular и хосты изображений
+    записанными или синтетическими ответами с настраиваемой задержкой
+    и долей ошибок.
+    """
+
+    def __init__(
+        self,
+        recipes: list[dict],
+        latency: float = 0,
+        image_latency: float = 0,
+        error_rate: float = 0,
+        seed: int = None,
+    ) -> None:
+        super().__init__()
+        self._recipes = recipes
+        self._latency = latency
+        self._image_latency = image_latency
+        self._error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._image = build_image()
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        url = urlparse(request.url)
+        if request.url.startswith(IMAGE_BASE_URL):
+            time.sleep(self._image_latency)
+            return self._build_response(request, content=self._image)
+        time.sleep(self._latency)
+        if url.path.endswith('recipes/random'):
+            number = int(parse_qs(url.query).get('number', ['1'])[0])
+            return self._build_response(
+                request,
+                content=json.dumps(
+                    {'recipes': self._take_recipes(number)}
+                ).encode(),
+            )
+        return self._build_response(request, content=b'', status=404)
+
+    def close(self) -> None:
+        pass
+
+    def _take_recipes(self, number: int) -> list[dict]:
+        recipes = []
+        for recipe in itertools.islice(
+            itertools.cycle(self._recipes), number
+        ):
+            recipe = dict(recipe)
+            recipe['title'] = f'{recipe["title"]} #{next(self._counter)}'
+            recipes.append(recipe)
+        return recipes
+
+    def _build_response(
+        self, request: PreparedRequest, content: bytes, status: int = 200
+    ) -> Response:
+        with self._lock:
+            if self._random.random() < self._error_rate:
+                status, content = 503, b''
+        response = Response()
+        response.status_code = status
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+
+class OfflineAdapter(BaseAdapter):
+    """
+    Транспорт для всех прочих хостов: реплей не должен обращаться в сеть.
+    """
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        raise OfflineError(
+            f'Реплей без сети: {request.url}', request=request
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class ReplayTranslator:
+    """
+    Переводчик-заглушка с задержкой одного запроса.
+    """
+
+    def __init__(self, latency: float = 0) -> None:
+        self._latency = latency
+        self.calls = 0
+
+    def __call__(
+        self, string: str, source: str = 'en', target: str = 'ru'
+    ) -> str:
+        self.calls += 1
+        time.sleep(self._latency)
+        return string
@@ -1,23 +1,47 @@
 import math
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator
 from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
 from deep_translator import GoogleTranslator
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
 from django.db import IntegrityError, transaction
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 from django.utils.html import strip_tags
 
+from .images import schedule_image_variants
 from .models.basic import Recipe, Tag, Ingredient
 from .models.m2m import IngredientAmount
+from .signals import ingredients_created
+from .translation import TranslationMemo
 from .type_annotations import RecipeResult, IngredientResult
 
 User = get_user_model()
 
 
+def get_http_session() -> requests.Session:
+    """
+    Сессия с пулом keep-alive соединений для обращений к внешним API.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_SIZE,
+        pool_maxsize=settings.HTTP_POOL_SIZE,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+http_session = get_http_session()
+
+
 class RecipesCrawler:
     API_URL = settings.SPOONACULAR_API_URL
     API_KEY = settings.SPOONACULAR_API_KEY
@@ -28,7 +52,11 @@ class RecipesCrawler:
         self._tag = tag
 
     def execute(self) -> None:
-        response = requests.get(url=self._get_url(), headers=self.HEADERS)
+        response = http_session.get(
+            url=self._get_url(),
+            headers=self.HEADERS,
+            timeout=settings.HTTP_TIMEOUT,
+        )
         response.raise_for_status()
         self._data = response.json().get('recipes')
 
@@ -57,6 +85,7 @@ class RecipesCrawler:
 
 class JsonParser:
     DEFAULT_UNIT = 'шт'
+    BATCH_SEPARATOR = '\n'
 
     def __init__(self, data: list[dict], tag: str) -> None:
         self._data = data
@@ -66,8 +95,67 @@ class JsonParser:
         self._ingredient = IngredientResult()
         self._recipe_fields = list(RecipeResult.__annotations__)
         self._ingredient_fields = list(IngredientResult.__annotations__)
+        self._strings = set()
+        self._recipe_strings = set()
+        self._result_strings = []
 
     def parse(self) -> None:
+        self._parse_data()
+        translations = self._translate_strings(strings=self._strings)
+        for recipe in self._result:
+            self._apply_translations(recipe=recipe, translations=translations)
+
+    def iter_parse(self) -> Iterator[RecipeResult]:
+        """
+        Потоковый разбор: уникальные строки всей пачки переводятся
+        параллельно пачками, и каждый рецепт отдаётся, как только
+        переведены пачки с его строками, не дожидаясь остальных.
+        Обращения к БД остаются в текущем потоке.
+        """
+        self._parse_data()
+        memo = TranslationMemo()
+        translations = memo.lookup(strings=self._strings)
+        missing = self._strings - translations.keys()
+        with ThreadPoolExecutor(
+            max_workers=settings.TRANSLATION_WORKERS
+        ) as executor:
+            futures = {}
+            for batch in self._get_batches(strings=missing):
+                future = executor.submit(self._translate_batch, batch)
+                futures.update(dict.fromkeys(batch, future))
+            waiting = [
+                (recipe, {futures[key] for key in strings if key in futures})
+                for recipe, strings in zip(self._result, self._result_strings)
+            ]
+            done = set()
+            yield from self._pop_translated(waiting, done, translations)
+            for future in as_completed(set(futures.values())):
+                new_translations, latencies = self._merge_batches(
+                    [future.result()]
+                )
+                memo.store(translations=new_translations, latencies=latencies)
+                translations.update(new_translations)
+                done.add(future)
+                yield from self._pop_translated(waiting, done, translations)
+
+    def _pop_translated(
+        self, waiting: list[tuple], done: set, translations: dict[str, str]
+    ) -> Iterator[RecipeResult]:
+        """
+        Убирает из waiting рецепты, все пачки строк которых переведены.
+        """
+        pending = []
+        for recipe, futures in waiting:
+            if futures <= done:
+                self._apply_translations(
+                    recipe=recipe, translations=translations
+                )
+                yield recipe
+            else:
+                pending.append((recipe, futures))
+        waiting[:] = pending
+
+    def _parse_data(self) -> None:
         for recipe in self._data:
             try:
                 for field in self._recipe_fields:
@@ -86,6 +174,7 @@ class JsonParser:
 
     def _clear_recipe(self) -> None:
         self._recipe.clear()
+        self._recipe_strings.clear()
 
     def _clear_ingredient(self) -> None:
         self._ingredient.clear()
@@ -94,12 +183,12 @@ class JsonParser:
         self, element: dict, data: RecipeResult | IngredientResult
     ) -> None:
         text = element.get('title') or element.get('name').lower()
-        data['name'] = self._translate_string(string=text)
+        data['name'] = self._add_translation(string=text)
 
     def _set_text(
         self, element: dict, data: RecipeResult | IngredientResult
     ) -> None:
-        data['text'] = self._translate_string(string=element['summary'])
+        data['text'] = self._add_translation(string=element['summary'])
 
     def _set_image(
         self, element: dict, data: RecipeResult | IngredientResult
@@ -138,7 +227,7 @@ class JsonParser:
     ) -> None:
         unit = element['measures']['us']['unitLong'].lower()
         if unit:
-            unit = self._translate_string(string=unit)
+            unit = self._add_translation(string=unit)
         else:
             unit = self.DEFAULT_UNIT
         data['measurement_unit'] = unit
@@ -150,48 +239,188 @@ class JsonParser:
 
     def _add_recipe_to_result(self) -> None:
         recipe = self._recipe.copy()
+        self._strings.update(self._recipe_strings)
+        self._result_strings.append(self._recipe_strings.copy())
         self._clear_recipe()
         self._result.append(recipe)
 
+    def _add_translation(self, string: str) -> str:
+        """
+        Откладывает перевод строки: строки всей пачки переводятся разом
+        после разбора, см. _translate_strings.
+        """
+        string = strip_tags(string)
+        self._recipe_strings.add(string)
+        return string
+
+    @staticmethod
+    def _apply_translations(
+        recipe: RecipeResult, translations: dict[str, str]
+    ) -> None:
+        recipe['name'] = translations.get(recipe['name'], recipe['name'])
+        recipe['text'] = translations.get(recipe['text'], recipe['text'])
+        for ingredient in recipe['ingredients']:
+            for field in ('name', 'measurement_unit'):
+                ingredient[field] = translations.get(
+                    ingredient[field], ingredient[field]
+                )
+
+    def _translate_strings(self, strings: set[str]) -> dict[str, str]:
+        """
+        Переводит уникальные строки пачками с ограниченным параллелизмом.
+        Короткие однострочные строки объединяются через перевод строки
+        в один запрос, длинные переводятся отдельно.
+        """
+        memo = TranslationMemo()
+        translations = memo.lookup(strings=strings)
+        missing = strings - translations.keys()
+        with ThreadPoolExecutor(
+            max_workers=settings.TRANSLATION_WORKERS
+        ) as executor:
+            new_translations, latencies = self._merge_batches(
+                executor.map(
+                    self._translate_batch, self._get_batches(strings=missing)
+                )
+            )
+        memo.store(translations=new_translations, latencies=latencies)
+        translations.update(new_translations)
+        return translations
+
+    @staticmethod
+    def _merge_batches(results: Iterable[tuple]) -> tuple[dict, dict]:
+        translations = {}
+        latencies = {}
+        for batch_translations, latency in results:
+            translations.update(batch_translations)
+            for string in batch_translations:
+                latencies[string] = latency / len(batch_translations)
+        return translations, latencies
+
+    def _translate_batch(self, batch: list[str]) -> tuple[dict, float]:
+        start = time.perf_counter()
+        if len(batch) > 1:
+            translated = self._translate_string(
+                string=self.BATCH_SEPARATOR.join(batch)
+            ).split(self.BATCH_SEPARATOR)
+            if len(translated) == len(batch):
+                translations = {
+                    string: translation.strip()
+                    for string, translation in zip(batch, translated)
+                }
+                return translations, time.perf_counter() - start
+        translations = {
+            string: self._translate_string(string) for string in batch
+        }
+        return translations, time.perf_counter() - start
+
+    def _get_batches(self, strings: set[str]) -> list[list[str]]:
+        batches = []
+        batch = []
+        size = 0
+        for string in sorted(strings):
+            if self.BATCH_SEPARATOR in string or (
+                len(string) > settings.TRANSLATION_BATCH_SIZE
+            ):
+                batches.append([string])
+                continue
+            if size + len(string) + 1 > settings.TRANSLATION_BATCH_SIZE:
+                batches.append(batch)
+                batch = []
+                size = 0
+            batch.append(string)
+            size += len(string) + 1
+        if batch:
+            batches.append(batch)
+        return batches
+
     @staticmethod
     def _translate_string(
         string: str, source: str = 'en', target: str = 'ru'
     ) -> str:
         return GoogleTranslator(source=source, target=target).translate(
-            strip_tags(string)
+            string
         )
 
 
 class RecipeSaver:
-    def __init__(self, data: list[dict], user: User) -> None:
-        self._data = data
-        self._ingredient_names = None
-        self._ingredient_units = None
+    INGREDIENT_CHUNK_SIZE = 500
+
+    def __init__(self, user: User, data: list[dict] = None) -> None:
+        self._data = data or []
+        self._ingredients = {}
+        self._images = {}
         self._count = 0
         self._user = user
+        self.download_time = 0.0
+        self.first_recipe_time = None
 
     def save(self) -> int:
+        self._images = self._download_images(
+            urls={recipe['image'] for recipe in self._data}
+        )
+        self._ingredients = self._resolve_ingredients(data=self._data)
         for recipe in self._data:
-            ingredients_data = recipe.pop('ingredients')
-
-            try:
-                with transaction.atomic():
-                    recipe = self._save_recipe(user=self._user, data=recipe)
-                    self._bulk_create(recipe=recipe, data=ingredients_data)
-            except IntegrityError:
-                continue
-
-            self._count += 1
+            self._save_one(data=recipe)
+        return self._count
 
+    def save_stream(
+        self, recipes: Iterable[RecipeResult], image_urls: Iterable[str]
+    ) -> int:
+        """
+        Сохраняет рецепты по мере их поступления из генератора.
+        Скачивание изображений запускается сразу, до окончания разбора,
+        а каждый рецепт ждёт только своё изображение.
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=settings.IMAGE_DOWNLOAD_WORKERS
+        ) as executor:
+            downloads = {
+                url: executor.submit(self._get_image, url=url)
+                for url in set(image_urls)
+            }
+            for recipe in recipes:
+                future = downloads.get(recipe['image'])
+                if future is None:
+                    continue
+                wait_start = time.perf_counter()
+                try:
+                    self._images[recipe['image']] = future.result()
+                except requests.RequestException:
+                    continue
+                finally:
+                    self.download_time += time.perf_counter() - wait_start
+                self._ingredients.update(
+                    self._resolve_ingredients(data=[recipe])
+                )
+                saved = self._save_one(data=recipe)
+                if saved and self.first_recipe_time is None:
+                    self.first_recipe_time = time.perf_counter() - start
         return self._count
 
+    def _save_one(self, data: dict) -> bool:
+        if data['image'] not in self._images:
+            return False
+        ingredients_data = data.pop('ingredients')
+        try:
+            with transaction.atomic():
+                recipe = self._save_recipe(user=self._user, data=data)
+                self._bulk_create_ingredient_amount(
+                    recipe=recipe, data=ingredients_data
+                )
+        except (IntegrityError, KeyError):
+            return False
+        self._count += 1
+        return True
+
     def _save_recipe(self, user: User, data: dict) -> Recipe:
         tag_data = data.pop('tag')
         url = data.pop('image')
-        image, name = self._get_image(url=url)
+        image, name = self._images[url]
         recipe = Recipe(author=user, **data)
         recipe.image.save(name, ContentFile(image))
         recipe.save()
+        schedule_image_variants(recipe)
         recipe.tags.set(self._get_tag(tag_data))
         return recipe
 
@@ -199,45 +428,93 @@ class RecipeSaver:
     def _get_tag(tag) -> QuerySet:
         return Tag.objects.filter(slug=tag)
 
+    def _download_images(self, urls: set[str]) -> dict[str, tuple]:
+        """
+        Параллельная загрузка изображений всей пачки до открытия
+        транзакций. Рецепты с незагруженным изображением пропускаются.
+        """
+        start = time.perf_counter()
+        images = {}
+        with ThreadPoolExecutor(
+            max_workers=settings.IMAGE_DOWNLOAD_WORKERS
+        ) as executor:
+            futures = {
+                executor.submit(self._get_image, url=url): url for url in urls
+            }
+            for future in as_completed(futures):
+                try:
+                    images[futures[future]] = future.result()
+                except requests.RequestException:
+                    continue
+        self.download_time = time.perf_counter() - start
+        return images
+
     @staticmethod
     def _get_image(url: str) -> tuple[bytes, str]:
-        response = requests.get(url)
+        response = http_session.get(url, timeout=settings.HTTP_TIMEOUT)
         response.raise_for_status()
         data = response.content
         filename = url.split('/')[-1]
         return data, filename
 
-    def _bulk_create(self, recipe: Recipe, data: list[dict]) -> None:
-        self._ingredient_names = {fields['name'].lower() for fields in data}
-        self._ingredient_units = {
-            fields['measurement_unit'].lower() for fields in data
+    def _resolve_ingredients(
+        self, data: list[dict]
+    ) -> dict[tuple[str, str], Ingredient]:
+        """
+        Загружает ингредиенты всей пачки по точным парам (название,
+        единица измерения) и создаёт недостающие одним bulk_create.
+        Уже загруженные ранее пары пропускаются без запросов.
+        """
+        keys = {
+            self._get_ingredient_key(element)
+            for recipe in data
+            for element in recipe['ingredients']
         }
-        self._bulk_create_ingredients(data=data)
-        self._bulk_create_ingredient_amount(recipe=recipe, data=data)
+        keys = [
+            key
+            for key in keys
+            if key not in self._ingredients
+            and self._is_valid_ingredient_key(key)
+        ]
+        ingredients = self._get_ingredients(keys=keys)
+        missing = [key for key in keys if key not in ingredients]
+        if missing:
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in missing
+                ],
+                ignore_conflicts=True,
+            )
+            ingredients.update(self._get_ingredients(keys=missing))
+            ingredients_created.send(sender=self.__class__)
+        return ingredients
 
-    def _bulk_create_ingredients(self, data: list[dict]) -> None:
-        ingredients_in_db = self._get_ingredient_in_db()
-        valid_date = self._validate_ingredient_data(
-            data=data, ingredients=ingredients_in_db
-        )
-        ingredients = [
-            Ingredient(
-                name=element['name'].lower(),
-                measurement_unit=element['measurement_unit'].lower(),
+    def _get_ingredients(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], Ingredient]:
+        ingredients = {}
+        for start in range(0, len(keys), self.INGREDIENT_CHUNK_SIZE):
+            chunk = keys[start:start + self.INGREDIENT_CHUNK_SIZE]
+            condition = Q()
+            for name, unit in chunk:
+                condition |= Q(name=name, measurement_unit=unit)
+            ingredients.update(
+                {
+                    (ingredient.name, ingredient.measurement_unit): ingredient
+                    for ingredient in Ingredient.objects.filter(condition)
+                }
             )
-            for element in valid_date
-        ]
-        Ingredient.objects.bulk_create(ingredients)
+        return ingredients
 
     def _bulk_create_ingredient_amount(
         self, recipe: Recipe, data: list[dict]
     ) -> None:
-        ingredients_in_db = self._get_ingredient_in_db()
         elements = [
             IngredientAmount(
-                ingredient=self._get_valid_ingredient(
-                    element=ingredient, ingredients_in_db=ingredients_in_db
-                ),
+                ingredient=self._ingredients[
+                    self._get_ingredient_key(ingredient)
+                ],
                 recipe=recipe,
                 amount=ingredient['amount'],
             )
@@ -245,55 +522,15 @@ class RecipeSaver:
         ]
         IngredientAmount.objects.bulk_create(elements)
 
-    def _validate_ingredient_data(
-        self, data: list[dict], ingredients: QuerySet
-    ) -> list[dict]:
-        valid_date = [
-            element
-            for element in data
-            if not self._if_exist_ingredient(
-                element=(
-                    element['name'].lower(),
-                    element['measurement_unit'].lower(),
-                ),
-                ingredients=self._transformation_ingredients(ingredients),
-            )
-        ]
-        return [
-            dict(field)
-            for field in set(
-                frozenset(element.items()) for element in valid_date
-            )
-        ]
-
-    def _get_ingredient_in_db(self) -> QuerySet:
-        return Ingredient.objects.filter(
-            name__in=self._ingredient_names,
-            measurement_unit__in=self._ingredient_units,
-        )
-
-    @staticmethod
-    def _if_exist_ingredient(
-        ingredients: set[tuple],
-        element: tuple,
-    ) -> bool:
-        return element in ingredients
-
     @staticmethod
-    def _transformation_ingredients(ingredients: QuerySet) -> set[tuple]:
-        return {
-            (ingredient.name.lower(), ingredient.measurement_unit.lower())
-            for ingredient in ingredients
-        }
+    def _get_ingredient_key(element: dict) -> tuple[str, str]:
+        return element['name'].lower(), element['measurement_unit'].lower()
 
     @staticmethod
-    def _get_valid_ingredient(
-        element: dict, ingredients_in_db: QuerySet
-    ) -> Ingredient:
-        return [
-            ingredient
-            for ingredient in ingredients_in_db
-            if ingredient.name.lower() == element['name'].lower()
-            and ingredient.measurement_unit.lower()
-            == element['measurement_unit'].lower()
-        ][0]
+    def _is_valid_ingredient_key(key: tuple[str, str]) -> bool:
+        name, unit = key
+        return (
+            len(name) <= Ingredient._meta.get_field('name').max_length
+            and len(unit)
+            <= Ingredient._meta.get_field('measurement_unit').max_length
+        )
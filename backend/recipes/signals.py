@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+from .images import release_variants
+from .models.basic import Recipe
+
+# Импорт рецептов создал ингредиенты через bulk_create, без post_save.
+ingredients_created = Signal()
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_variants(sender, instance: Recipe = None, **kwargs) -> None:
+    name = instance.image.name
+    variants = instance.image_variants
+    if variants:
+        transaction.on_commit(lambda: release_variants(name, variants))
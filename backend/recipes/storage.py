@@ -0,0 +1,58 @@
+import hashlib
+import os
+import uuid
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — sha256 его содержимого.
+    Одинаковые файлы записываются один раз: повторное сохранение
+    возвращает имя уже существующего файла. Файл удаляется, только
+    когда на него не осталось ссылок (см. is_referenced).
+    """
+
+    def save(self, name, content, max_length=None) -> str:
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name=name, content=content)
+        if self.exists(name):
+            return name
+        temporary_name = super().save(
+            f'{name}.{uuid.uuid4().hex}.tmp', content, max_length
+        )
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
+
+    def delete(self, name: str) -> None:
+        if name and not self.is_referenced(name):
+            super().delete(name)
+
+    def is_referenced(self, name: str) -> bool:
+        return False
+
+    @staticmethod
+    def get_content_name(name: str, content: File) -> str:
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, f'{digest.hexdigest()}{extension}')
+
+
+class RecipeImageStorage(ContentAddressedStorage):
+    """
+    Счётчиком ссылок служат сами рецепты: django_cleanup удаляет старый
+    файл после фиксации транзакции, и к этому моменту удалённый или
+    изменённый рецепт на него уже не ссылается.
+    """
+
+    def is_referenced(self, name: str) -> bool:
+        recipe = apps.get_model('recipes', 'Recipe')
+        return recipe.objects.filter(image=name).exists()
@@ -1,13 +1,16 @@
 import random
 
 import requests
+from celery import chord
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from config.celery_config import app
 from .exceptions import TaskFail
-from .models.basic import Tag
+from .images import build_variants, release_variants
+from .models.basic import Recipe, Tag
 from .services import RecipesCrawler, JsonParser, RecipeSaver
+from .translation import TranslationMemo
 
 User = get_user_model()
 
@@ -34,12 +37,25 @@ def get_recipes(self):
         raise self.retry(exc=error)
 
     data = crawler.result
-    parser = JsonParser(data=data, tag=tag)
-    parser.parse()
+    if settings.CELERY_RECIPES_FANOUT:
+        result = chord(
+            process_recipe.s(recipe=recipe, tag=tag, user_id=user.id)
+            for recipe in data
+        )(summarize_recipes.s())
+        return {
+            'status': 'dispatched',
+            'detail': f'Number of recipes dispatched: {len(data)}',
+            'chord': result.id,
+        }
 
-    result = parser.result
-    saver = RecipeSaver(data=result, user=user)
-    number_of_recipes_created = saver.save()
+    parser = JsonParser(data=data, tag=tag)
+    saver = RecipeSaver(user=user)
+    number_of_recipes_created = saver.save_stream(
+        recipes=parser.iter_parse(),
+        image_urls=[
+            recipe['image'] for recipe in data if recipe.get('image')
+        ],
+    )
 
     if not number_of_recipes_created:
         raise self.retry(exc=ValueError('Не одного рецепта не создано'))
@@ -47,4 +63,48 @@ def get_recipes(self):
     return {
         'status': 'successfully',
         'detail': f'Number of recipes created: {number_of_recipes_created}',
+        'images_download_time': round(saver.download_time, 3),
+        'first_recipe_time': saver.first_recipe_time
+        and round(saver.first_recipe_time, 3),
+        'translation_memo': TranslationMemo.stats(),
+    }
+
+
+@app.task(name='recipes.tasks.process_recipe')
+def process_recipe(recipe: dict, tag: str, user_id: int) -> int:
+    """
+    Разбор и сохранение одного рецепта в режиме CELERY_RECIPES_FANOUT.
+    """
+    user = User.objects.get(id=user_id)
+    parser = JsonParser(data=[recipe], tag=tag)
+    parser.parse()
+    return RecipeSaver(user=user, data=parser.result).save()
+
+
+@app.task(name='recipes.tasks.summarize_recipes')
+def summarize_recipes(counts: list[int]) -> dict:
+    return {
+        'status': 'successfully',
+        'detail': f'Number of recipes created: {sum(counts)}',
     }
+
+
+@app.task(name='recipes.tasks.build_image_variants')
+def build_image_variants(recipe_id: int) -> dict:
+    """
+    Строит варианты изображения рецепта. Если изображение успело
+    смениться, результат отбрасывается: новую версию построит
+    следующая задача.
+    """
+    try:
+        recipe = Recipe.objects.get(id=recipe_id)
+    except Recipe.DoesNotExist:
+        return {}
+    name = recipe.image.name
+    variants = build_variants(name=name)
+    updated = Recipe.objects.filter(id=recipe_id, image=name).update(
+        image_variants=variants
+    )
+    if not updated:
+        release_variants(name, variants)
+    return variants
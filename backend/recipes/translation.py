@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery
+from django.utils import timezone
+
+from .models.translations import Translation
+
+OFFLINE_DICTIONARY_PATH = os.path.join(
+    settings.BASE_DIR, 'data', 'translations.json'
+)
+COUNTERS = ('hits', 'misses', 'saved_latency_ms')
+
+
+@lru_cache
+def get_offline_dictionary() -> dict:
+    with open(OFFLINE_DICTIONARY_PATH, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def get_key(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode()).hexdigest()
+
+
+class TranslationMemo:
+    """
+    Постоянный кэш переводов в БД с вытеснением давно не
+    использованных записей и счётчиками попаданий в Redis.
+    """
+
+    def __init__(self, source: str = 'en', target: str = 'ru') -> None:
+        self._source = source
+        self._target = target
+        self._dictionary = (
+            get_offline_dictionary().get(source, {}).get(target, {})
+        )
+
+    def lookup(self, strings: set[str]) -> dict[str, str]:
+        translations = {}
+        for string in strings:
+            translation = self._dictionary.get(normalize(string).lower())
+            if translation is not None:
+                translations[string] = translation
+        keys = {
+            get_key(string): string
+            for string in strings
+            if string not in translations
+        }
+        records = list(
+            Translation.objects.filter(
+                source=self._source, target=self._target, key__in=keys
+            )
+        )
+        now = timezone.now()
+        for record in records:
+            translations[keys[record.key]] = record.translation
+            record.hits += 1
+            record.last_used = now
+        Translation.objects.bulk_update(records, fields=('hits', 'last_used'))
+        self._increment('hits', len(translations))
+        self._increment('misses', len(strings) - len(translations))
+        self._increment(
+            'saved_latency_ms',
+            int(sum(record.latency for record in records) * 1000),
+        )
+        return translations
+
+    def store(
+        self, translations: dict[str, str], latencies: dict[str, float]
+    ) -> None:
+        now = timezone.now()
+        Translation.objects.bulk_create(
+            [
+                Translation(
+                    source=self._source,
+                    target=self._target,
+                    key=get_key(text),
+                    text=text,
+                    translation=translation,
+                    latency=latencies.get(text, 0),
+                    last_used=now,
+                )
+                for text, translation in translations.items()
+            ],
+            ignore_conflicts=True,
+        )
+        self._evict()
+
+    @staticmethod
+    def stats() -> dict:
+        return {
+            counter: cache.get(f'translation:{counter}', 0)
+            for counter in COUNTERS
+        }
+
+    @staticmethod
+    def _evict() -> None:
+        excess = (
+            Translation.objects.count() - settings.TRANSLATION_MEMO_MAX_SIZE
+        )
+        if excess > 0:
+            Translation.objects.filter(
+                pk__in=Subquery(
+                    Translation.objects.order_by('last_used').values('pk')[
+                        :excess
+                    ]
+                )
+            ).delete()
+
+    @staticmethod
+    def _increment(counter: str, value: int) -> None:
+        if not value:
+            return
+        key = f'translation:{counter}'
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, value)